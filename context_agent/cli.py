@@ -649,12 +649,8 @@ def _merge_config_and_heartbeat(config_status: str, config_detail: str, heartbea
     return ("unavailable", hb_detail or f"{label} unavailable")
 
 
-def cmd_doctor(args) -> int:
-    ctx_home = default_ctx_home()
-    registry = Registry(ctx_home)
-    project_path = resolve_project_path(args, registry)
-    store = ProjectStore(project_path)
-
+def build_doctor_payload(project_path, registry: Registry, store: ProjectStore) -> dict:
+    """Assemble the doctor checks for a project as a plain dict."""
     cursor_cfg_status, cursor_cfg_detail = inspect_cursor_mcp_config(project_path)
     claude_mcp_cfg_status, claude_mcp_cfg_detail, claude_hooks_cfg = inspect_claude_settings(project_path)
     codex_mcp_cfg_status, codex_mcp_cfg_detail = inspect_codex_config(project_path)
@@ -706,7 +702,7 @@ def cmd_doctor(args) -> int:
             fallback_state = "degraded"
             fallback_detail = f"configured logs missing: {'; '.join(missing)}"
 
-    payload = {
+    return {
         "project": str(project_path),
         "checks": {
             "cursor_mcp": {"status": cursor_state, "detail": cursor_detail},
@@ -718,6 +714,14 @@ def cmd_doctor(args) -> int:
         },
     }
 
+
+def cmd_doctor(args) -> int:
+    ctx_home = default_ctx_home()
+    registry = Registry(ctx_home)
+    project_path = resolve_project_path(args, registry)
+    store = ProjectStore(project_path)
+    payload = build_doctor_payload(project_path, registry, store)
+
     if args.json:
         print(json.dumps(payload, indent=2, ensure_ascii=True))
     else:
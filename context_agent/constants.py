@@ -8,7 +8,7 @@ RECENT_EVENTS_DEFAULT = 5
 RECORDING_STATES = {"recording", "stopped", "stopping"}
 SUPPORTED_MCP_CLIENTS = ("cursor", "claude", "codex")
 SUPPORTED_ADAPTERS = ("cursor", "claude", "codex")
-EVENT_TYPES = {
+EVENT_TYPES = frozenset({
     "user_intent",
     "agent_plan",
     "code_change",
@@ -19,7 +19,7 @@ EVENT_TYPES = {
     "error_seen",
     "task_status",
     "handoff",
-}
+})
 HIGH_VALUE_EVENT_TYPES = {"decision_made", "handoff", "error_seen", "tool_use", "revert"}
 DELETED_FILE_HASH = "__deleted__"
 PROJECT_MEMORY_DIR = ".context-memory"
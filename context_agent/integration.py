@@ -5,6 +5,7 @@ from __future__ import annotations
 import json
 import re
 import shutil
+from functools import lru_cache
 from pathlib import Path
 
 from .utils import ensure_dir, normalize_path
@@ -156,6 +157,21 @@ RULES_BLOCK_BY_TOOL = {
     "claude": CLAUDE_RULES_BLOCK,
     "codex": CODEX_RULES_BLOCK,
 }
+# Normalized once at import so ensure_tool_rules does not re-strip ~2 KB blocks per call.
+_RULES_BLOCK_NORMALIZED_BY_TOOL = {
+    tool: block.strip() + "\n" for tool, block in RULES_BLOCK_BY_TOOL.items()
+}
+
+
+_PRE_POST_EVENTS = frozenset({"PreToolUse", "PostToolUse"})
+_CTX_EXE_NAMES = frozenset({"ctx", "ctx.exe"})
+_QUOTE_CHARS = frozenset('"\'')
+
+
+@lru_cache(maxsize=64)
+def _normalized(path_str: str) -> Path:
+    """Memoized normalize_path so one `ctx init` resolves the project path once."""
+    return normalize_path(path_str)
 
 
 def _hook_command(project: Path, event: str) -> str:
@@ -175,7 +191,7 @@ def _is_ctx_hook_command(value: str, project: Path, event: str) -> bool:
 
 def _ctx_hook_entry(project: Path, event: str) -> dict:
     command = _hook_command(project, event)
-    if event in {"PreToolUse", "PostToolUse"}:
+    if event in _PRE_POST_EVENTS:
         return {
             "matcher": "*",
             "hooks": [{"type": "command", "command": command}],
@@ -230,14 +246,16 @@ def _is_valid_ctx_command(command: object) -> bool:
         return False
     if command == "ctx":
         return True
-    return Path(command).name in {"ctx", "ctx.exe"}
+    return Path(command).name in _CTX_EXE_NAMES
 
 
 def _read_json(path: Path, force: bool) -> dict:
-    if not path.exists():
+    try:
+        raw = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
         return {}
     try:
-        loaded = json.loads(path.read_text(encoding="utf-8"))
+        loaded = json.loads(raw)
     except json.JSONDecodeError:
         if force:
             return {}
@@ -250,9 +268,10 @@ def _read_json(path: Path, force: bool) -> dict:
 
 
 def _read_toml_text(path: Path, force: bool) -> str:
-    if not path.exists():
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
         return ""
-    text = path.read_text(encoding="utf-8")
     if not text.strip():
         return ""
     if tomllib is not None:
@@ -315,6 +334,10 @@ def _read_toml_text(path: Path, force: bool) -> str:
     return text
 
 
+def _toml_quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
 def _toml_table_name(line: str) -> str | None:
     stripped = line.strip()
     if not stripped.startswith("[") or not stripped.endswith("]"):
@@ -334,7 +357,7 @@ def _split_toml_dotted_name(value: str) -> list[str]:
             if char == quote:
                 quote = None
             continue
-        if char in {'"', "'"}:
+        if char in _QUOTE_CHARS:
             quote = char
             current.append(char)
             continue
@@ -353,7 +376,7 @@ def _split_toml_dotted_name(value: str) -> list[str]:
 
 def _normalize_toml_token(token: str) -> str:
     value = token.strip()
-    if len(value) >= 2 and value[0] == value[-1] and value[0] in {'"', "'"}:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in _QUOTE_CHARS:
         return value[1:-1]
     return value
 
@@ -413,7 +436,7 @@ def _split_toml_array_items(value: str) -> list[str] | None:
                 quote = None
             escape = False
             continue
-        if char in {'"', "'"}:
+        if char in _QUOTE_CHARS:
             quote = char
             current.append(char)
             continue
@@ -448,16 +471,15 @@ def _upsert_codex_ctx_server_table(existing_text: str, project: Path) -> str:
         lines.pop()
 
     ctx_command = _resolve_ctx_command()
-    args_json = json.dumps(["mcp", "serve", "--project-path", str(project)], ensure_ascii=True)
-    command_json = json.dumps(ctx_command, ensure_ascii=True)
+    args_toml = f'["mcp", "serve", "--project-path", {_toml_quote(str(project))}]'
 
     if lines:
         lines.append("")
     lines.extend(
         [
             f'[mcp_servers."{CTX_SERVER_NAME}"]',
-            f"command = {command_json}",
-            f"args = {args_json}",
+            f"command = {_toml_quote(ctx_command)}",
+            f"args = {args_toml}",
             "",
         ]
     )
@@ -517,7 +539,7 @@ def ensure_tool_rules(project_path: Path, tool: str) -> tuple[Path, bool]:
         allowed = ", ".join(sorted(RULES_PATH_BY_TOOL))
         raise ValueError(f"Unsupported rules tool '{tool}'. Allowed: {allowed}")
 
-    project = normalize_path(project_path)
+    project = _normalized(str(project_path))
     rel_path = RULES_PATH_BY_TOOL[tool_name]
     path = project / rel_path
     ensure_dir(path.parent)
@@ -529,7 +551,7 @@ def ensure_tool_rules(project_path: Path, tool: str) -> tuple[Path, bool]:
     else:
         content = ""
 
-    block = RULES_BLOCK_BY_TOOL[tool_name].strip() + "\n"
+    block = _RULES_BLOCK_NORMALIZED_BY_TOOL[tool_name]
     updated = content
     if updated and not updated.endswith("\n"):
         updated += "\n"
@@ -541,7 +563,7 @@ def ensure_tool_rules(project_path: Path, tool: str) -> tuple[Path, bool]:
 
 
 def ensure_gitignore_entry(project_path: Path, entry: str = ".context-memory/") -> bool:
-    gitignore = normalize_path(project_path) / ".gitignore"
+    gitignore = _normalized(str(project_path)) / ".gitignore"
     if not gitignore.exists():
         gitignore.write_text(f"{entry}\n", encoding="utf-8")
         return True
@@ -558,7 +580,7 @@ def ensure_gitignore_entry(project_path: Path, entry: str = ".context-memory/")
 
 
 def update_cursor_mcp_config(project_path: Path, force: bool = False) -> Path:
-    project = normalize_path(project_path)
+    project = _normalized(str(project_path))
     config_path = project / ".cursor" / "mcp.json"
     payload = _read_json(config_path, force=force)
     mcp_servers = payload.get("mcpServers")
@@ -576,7 +598,7 @@ def update_cursor_mcp_config(project_path: Path, force: bool = False) -> Path:
 
 
 def update_claude_settings(project_path: Path, force: bool = False) -> Path:
-    project = normalize_path(project_path)
+    project = _normalized(str(project_path))
     settings_path = project / ".claude" / "settings.local.json"
     payload = _read_json(settings_path, force=force)
 
@@ -611,7 +633,7 @@ def update_claude_settings(project_path: Path, force: bool = False) -> Path:
 
 
 def update_codex_config(project_path: Path, force: bool = False) -> Path:
-    project = normalize_path(project_path)
+    project = _normalized(str(project_path))
     config_path = project / ".codex" / "config.toml"
     existing = _read_toml_text(config_path, force=force)
     updated = _upsert_codex_ctx_server_table(existing, project)
@@ -623,12 +645,14 @@ def update_codex_config(project_path: Path, force: bool = False) -> Path:
 
 
 def inspect_cursor_mcp_config(project_path: Path) -> tuple[str, str]:
-    project = normalize_path(project_path)
+    project = _normalized(str(project_path))
     path = project / ".cursor" / "mcp.json"
-    if not path.exists():
+    try:
+        raw = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
         return ("unavailable", f"missing {path}")
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        payload = json.loads(raw)
     except json.JSONDecodeError:
         return ("degraded", f"invalid JSON in {path}")
     servers = payload.get("mcpServers")
@@ -648,12 +672,14 @@ def inspect_cursor_mcp_config(project_path: Path) -> tuple[str, str]:
 
 
 def inspect_claude_settings(project_path: Path) -> tuple[str, str, tuple[str, str]]:
-    project = normalize_path(project_path)
+    project = _normalized(str(project_path))
     path = project / ".claude" / "settings.local.json"
-    if not path.exists():
+    try:
+        raw = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
         return ("unavailable", f"missing {path}", ("unavailable", f"missing {path}"))
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        payload = json.loads(raw)
     except json.JSONDecodeError:
         return (
             "degraded",
@@ -703,9 +729,9 @@ def inspect_claude_settings(project_path: Path) -> tuple[str, str, tuple[str, st
 
 
 def inspect_codex_config(project_path: Path) -> tuple[str, str]:
-    project = normalize_path(project_path)
+    project = _normalized(str(project_path))
     path = project / ".codex" / "config.toml"
-    if not path.exists():
+    if not path.is_file():
         return ("unavailable", f"missing {path}")
     try:
         text = _read_toml_text(path, force=False)
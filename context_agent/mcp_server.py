@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import io
 import json
+import os
+import re
 import sys
-from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
@@ -12,11 +14,169 @@ from .constants import EVENT_TYPES, SUPPORTED_MCP_CLIENTS
 from .project_db import ProjectStore
 from .utils import normalize_path, utc_now
 
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional accelerator
+    orjson = None  # type: ignore[assignment]
+
+if orjson is not None:
+    def _json_dumps(payload: Any) -> bytes:
+        return orjson.dumps(payload)
+
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(payload: Any) -> bytes:
+        # stdio is binary-safe, so emit UTF-8 directly rather than paying the
+        # per-character \uXXXX escape loop (orjson already does this natively).
+        return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    _json_loads = json.loads
+
+
+# Frozen once so hot membership checks never rebuild a set from the tuple,
+# and source labels are formatted once instead of per event.
+_CLIENTS = frozenset(SUPPORTED_MCP_CLIENTS)
+_MCP_SOURCES = {client: f"mcp:{client}" for client in SUPPORTED_MCP_CLIENTS}
+
 
-@dataclass
 class MCPError(Exception):
-    code: int
-    message: str
+    __slots__ = ("code", "message")
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+_TOOLS_SPEC: list[dict[str, Any]] = [
+    {
+        "name": "get_context",
+        "description": "Fetch project context summary from local memory.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "max_events": {"type": "integer", "minimum": 1, "maximum": 100, "default": 20},
+                "include_effective_state": {"type": "boolean", "default": True},
+            },
+        },
+    },
+    {
+        "name": "append_event",
+        "description": "Append summarized event into project memory.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "event_type": {"type": "string"},
+                "summary": {"type": "string"},
+                "files_touched": {"type": "array", "items": {"type": "string"}},
+                "decision": {"type": "boolean", "default": False},
+                "tool_name": {"type": ["string", "null"]},
+                "tool_result": {"type": ["string", "null"]},
+                "source_detail": {"type": ["string", "null"]},
+                "client": {
+                    "anyOf": [
+                        {"type": "string", "enum": list(SUPPORTED_MCP_CLIENTS)},
+                        {"type": "null"},
+                    ]
+                },
+                "session_id": {"type": ["integer", "null"]},
+            },
+            "required": ["summary"],
+        },
+    },
+    {
+        "name": "start_chat_session",
+        "description": "Start or attach to chat session for client.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "client": {"type": "string", "enum": list(SUPPORTED_MCP_CLIENTS)},
+                "external_session_ref": {"type": ["string", "null"]},
+            },
+            "required": ["client"],
+        },
+    },
+    {
+        "name": "stop_chat_session",
+        "description": "Stop session by id.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"session_id": {"type": "integer"}},
+            "required": ["session_id"],
+        },
+    },
+    {
+        "name": "ping",
+        "description": "Heartbeat for MCP diagnostics.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"client": {"type": "string", "enum": list(SUPPORTED_MCP_CLIENTS)}},
+            "required": ["client"],
+        },
+    },
+]
+
+# The tool schema is immutable at runtime, so tools/list responses are
+# serialized once at import instead of per call.
+_TOOLS_LIST_RESULT = _json_dumps({"tools": _TOOLS_SPEC})
+
+# JSON-RPC envelopes have a fixed shape; formatting into these templates
+# replaces a full encoder pass over the response dict.
+_RESULT_TMPL = b'{"jsonrpc":"2.0","id":%b,"result":%b}'
+_ERROR_TMPL = b'{"jsonrpc":"2.0","id":%b,"error":{"code":%d,"message":%b}}'
+
+
+# Notifications the server has no handler for; they are dropped right after
+# parsing so serve() never pays the dispatch round-trip for them.
+_IGNORED_NOTIFICATIONS = frozenset({"notifications/cancelled", "$/progress"})
+_SKIPPED: dict[str, Any] = {}
+
+_CONTENT_LENGTH_RE = re.compile(rb"Content-Length:\s*(\d+)")
+
+
+def _s(value: Any, default: str = "") -> str:
+    # JSON arguments are almost always already str; skip the str() constructor then.
+    if type(value) is str:
+        return value.strip()
+    if value is None:
+        return default
+    return str(value).strip()
+
+
+def _validate_append_event_args(arguments: dict[str, Any]) -> tuple:
+    """Coerce and validate append_event arguments in one pass.
+
+    Hand-rolled stand-in for schema-compiled validators, which this
+    stdlib-only package does not depend on.
+    """
+    event_type = _s(arguments.get("event_type"), "task_status")
+    if event_type not in EVENT_TYPES:
+        event_type = "task_status"
+
+    summary = _s(arguments.get("summary"))
+    if not summary:
+        raise MCPError(-32602, "summary is required")
+
+    files_touched = arguments.get("files_touched") or []
+    if not isinstance(files_touched, list):
+        raise MCPError(-32602, "files_touched must be an array")
+    # Decoded JSON arrays are almost always all-str; skip the rebuild then.
+    if not all(type(item) is str for item in files_touched):
+        files_touched = [item for item in files_touched if isinstance(item, str)]
+
+    decision = bool(arguments.get("decision", False))
+    tool_name = arguments.get("tool_name")
+    tool_result = arguments.get("tool_result")
+    client = _s(arguments.get("client"), "unknown").lower()
+    return event_type, summary, files_touched, decision, tool_name, tool_result, client
+
+
+def _encode_id(request_id: Any) -> bytes:
+    if request_id is None:
+        return b"null"
+    if type(request_id) is int:
+        return b"%d" % request_id
+    return _json_dumps(request_id)
 
 
 class MCPServer:
@@ -27,298 +187,300 @@ class MCPServer:
         # - "lsp": Content-Length framed JSON-RPC
         # - "jsonl": one JSON object per line
         self._transport_mode = "auto"
+        # Large userspace read buffer so header parsing does not pay one
+        # syscall per line. Under `python -u` stdin is raw FileIO with no `.raw`.
+        self._stdin = io.BufferedReader(getattr(sys.stdin.buffer, "raw", sys.stdin.buffer), buffer_size=65536)
+        # Responses go straight to the fd: each frame is already assembled in
+        # one buffer, so the Python IO stack only adds locking and copies.
+        sys.stdout.flush()
+        self._out_fd = sys.stdout.fileno()
+        # Inbound bytes accumulate here; framing is parsed in userspace with
+        # find() instead of one readline() per header line.
+        self._rbuf = bytearray()
+        # At most one session is active at a time, so a resolved id is reused
+        # until this server starts or stops a session itself. "No session" is
+        # never cached: `ctx start` can run out of band at any time.
+        self._active_session_cache: int | None = None
+        self._active_session_dirty = True
+        # Reused for every outbound frame instead of allocating bytes per write.
+        self._scratch = bytearray()
+        # Single dict probe per message instead of a chain of string compares.
+        self._method_dispatch = {
+            "initialize": self._m_initialize,
+            "ping": self._m_ping,
+            "tools/list": self._m_tools_list,
+            "tools/call": self._m_tools_call,
+            "notifications/initialized": self._m_initialized,
+        }
+        self._tool_dispatch = {
+            "get_context": self._t_get_context,
+            "append_event": self._t_append_event,
+            "start_chat_session": self._t_start_chat_session,
+            "stop_chat_session": self._t_stop_chat_session,
+            "ping": self._t_ping,
+        }
+
+    def _fill_buffer(self) -> bool:
+        chunk = self._stdin.read1(65536)
+        if not chunk:
+            return False
+        self._rbuf += chunk
+        return True
 
     def _read_message(self) -> dict[str, Any] | None:
-        first_line = sys.stdin.buffer.readline()
-        if not first_line:
-            return None
+        buf = self._rbuf
+        while True:
+            newline = buf.find(b"\n")
+            if newline != -1:
+                break
+            if not self._fill_buffer():
+                return None
 
-        line = first_line.strip()
+        line = bytes(buf[:newline]).strip()
         if line.startswith(b"Content-Length:"):
             if self._transport_mode == "auto":
                 self._transport_mode = "lsp"
-            try:
-                length = int(line.split(b":", 1)[1].strip().decode("ascii"))
-            except Exception as exc:  # noqa: BLE001
-                raise MCPError(-32700, f"invalid Content-Length header: {exc}") from exc
+            # Locate the blank-line header terminator in one scan per fill.
             while True:
-                header_line = sys.stdin.buffer.readline()
-                if not header_line:
-                    raise MCPError(-32700, "unexpected EOF while reading headers")
-                if header_line in (b"\r\n", b"\n"):
+                end = buf.find(b"\r\n\r\n")
+                if end != -1:
+                    body_start = end + 4
+                    break
+                end = buf.find(b"\n\n")
+                if end != -1:
+                    body_start = end + 2
+                    break
+                if not self._fill_buffer():
+                    # Truncated headers mean the client went away: shut down
+                    # like any other EOF instead of erroring forever.
+                    return None
+            match = _CONTENT_LENGTH_RE.search(buf, 0, body_start)
+            if match is None:
+                # Drop the malformed header block so the next iteration
+                # resyncs on fresh bytes rather than re-parsing these.
+                del buf[:body_start]
+                raise MCPError(-32700, "invalid Content-Length header: no length found")
+            length = int(match.group(1))
+            while len(buf) - body_start < length:
+                if not self._fill_buffer():
                     break
-            payload = sys.stdin.buffer.read(length)
+            payload = bytes(buf[body_start:body_start + length])
+            del buf[:body_start + len(payload)]
             if not payload:
                 return None
             try:
-                return json.loads(payload.decode("utf-8"))
-            except json.JSONDecodeError as exc:
+                message = _json_loads(payload)
+            except ValueError as exc:
                 raise MCPError(-32700, f"invalid JSON payload: {exc}") from exc
+            return self._discard_ignored(message)
 
         if self._transport_mode == "auto":
             self._transport_mode = "jsonl"
+        del buf[:newline + 1]
         try:
-            return json.loads(line.decode("utf-8"))
-        except json.JSONDecodeError as exc:
+            message = _json_loads(line)
+        except ValueError as exc:
             raise MCPError(-32700, f"invalid JSON line payload: {exc}") from exc
+        return self._discard_ignored(message)
 
-    def _write_message(self, payload: dict[str, Any]) -> None:
-        encoded = json.dumps(payload, separators=(",", ":"), ensure_ascii=True).encode("utf-8")
+    @staticmethod
+    def _discard_ignored(message: dict[str, Any]) -> dict[str, Any]:
+        if "id" not in message and message.get("method") in _IGNORED_NOTIFICATIONS:
+            return _SKIPPED
+        return message
+
+    def _write_message(self, encoded: bytes) -> None:
+        scratch = self._scratch
+        scratch.clear()
         if self._transport_mode == "jsonl":
-            sys.stdout.buffer.write(encoded + b"\n")
-            sys.stdout.buffer.flush()
-            return
-        header = f"Content-Length: {len(encoded)}\r\n\r\n".encode("ascii")
-        sys.stdout.buffer.write(header + encoded)
-        sys.stdout.buffer.flush()
+            scratch += encoded
+            scratch += b"\n"
+        else:
+            scratch += b"Content-Length: %d\r\n\r\n" % len(encoded)
+            scratch += encoded
+        view = memoryview(scratch)
+        written = 0
+        while written < len(scratch):
+            written += os.write(self._out_fd, view[written:])
 
-    def _jsonrpc_result(self, request_id: Any, result: Any) -> dict[str, Any]:
-        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+    def _jsonrpc_result(self, request_id: Any, result: Any) -> bytes:
+        encoded = result if type(result) is bytes else _json_dumps(result)
+        return _RESULT_TMPL % (_encode_id(request_id), encoded)
 
-    def _jsonrpc_error(self, request_id: Any, code: int, message: str) -> dict[str, Any]:
-        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+    def _jsonrpc_error(self, request_id: Any, code: int, message: str) -> bytes:
+        return _ERROR_TMPL % (_encode_id(request_id), code, _json_dumps(message))
 
     def _active_session_id(self) -> int | None:
-        session = self.store.get_active_session()
-        if not session:
-            return None
-        return int(session["id"])
+        if self._active_session_dirty or self._active_session_cache is None:
+            session = self.store.get_active_session()
+            self._active_session_cache = int(session["id"]) if session else None
+            self._active_session_dirty = False
+        return self._active_session_cache
 
-    def _tool_text_result(self, payload: dict[str, Any], is_error: bool = False) -> dict[str, Any]:
-        text = json.dumps(payload, separators=(",", ":"), ensure_ascii=True)
-        result = {
-            "content": [{"type": "text", "text": text}],
-            "isError": bool(is_error),
-        }
-        if not is_error:
-            result["structuredContent"] = payload
-        return result
-
-    def _handle_tool(self, name: str, arguments: dict[str, Any]) -> dict[str, Any]:
-        if name == "get_context":
-            max_events = int(arguments.get("max_events", 20))
-            if max_events < 1:
-                max_events = 1
-            if max_events > 100:
-                max_events = 100
-            include_effective_state = bool(arguments.get("include_effective_state", True))
-            snapshot = self.store.status_snapshot(recent_limit=max_events)
-            project = snapshot["project"]
-            events = [
-                {
-                    "event_type": row["event_type"],
-                    "summary": row["summary"],
-                    "source": row["source"],
-                    "created_at": row["created_at"],
-                    "is_effective": int(row["is_effective"] or 0),
-                }
-                for row in snapshot["events"]
-            ]
-            payload = {
-                "project": str(self.project_path),
-                "last_updated_at": project["last_updated_at"] if project else None,
-                "recent_events": events,
-                "open_items": [],
-                "style_signals": [],
+    def _tool_text_result(self, payload: dict[str, Any], is_error: bool = False) -> dict[str, Any] | bytes:
+        buf = _json_dumps(payload)
+        if is_error:
+            return {
+                "content": [{"type": "text", "text": buf.decode("utf-8")}],
+                "isError": True,
             }
-            if include_effective_state:
-                payload["effective_changed_files"] = snapshot.get("effective_changed_files", 0)
-            return self._tool_text_result(payload)
-
-        if name == "append_event":
-            session_id = arguments.get("session_id")
-            if session_id is None:
-                session_id = self._active_session_id()
-            if session_id is None:
-                raise MCPError(-32010, "No active session. Run `ctx start` first.")
-
-            event_type = str(arguments.get("event_type", "task_status")).strip()
-            if event_type not in EVENT_TYPES:
-                event_type = "task_status"
-
-            summary = str(arguments.get("summary", "")).strip()
-            if not summary:
-                raise MCPError(-32602, "summary is required")
-
-            files_touched = arguments.get("files_touched") or []
-            if not isinstance(files_touched, list):
-                raise MCPError(-32602, "files_touched must be an array")
-            files_touched = [str(item) for item in files_touched if isinstance(item, str)]
-
-            decision = bool(arguments.get("decision", False))
-            tool_name = arguments.get("tool_name")
-            tool_result = arguments.get("tool_result")
-            client = str(arguments.get("client", "unknown")).lower()
-            source = f"mcp:{client}" if client in SUPPORTED_MCP_CLIENTS else "mcp:unknown"
-            source_detail = arguments.get("source_detail")
-            if source_detail:
-                source = f"{source}:{str(source_detail)[:40]}"
-
-            event_id = self.store.insert_event(
-                session_id=int(session_id),
-                event_type=event_type,
-                summary=summary,
-                files_touched=files_touched,
-                source=source,
-                tool_name=str(tool_name) if tool_name else None,
-                tool_result=str(tool_result) if tool_result else None,
-                decision_summary=summary if decision else None,
-            )
-            if client in SUPPORTED_MCP_CLIENTS:
-                self.store.update_source_status(int(session_id), f"mcp:{client}", "available", f"heartbeat {utc_now()}")
-            return self._tool_text_result({"ok": True, "event_id": event_id, "session_id": int(session_id)})
-
-        if name == "start_chat_session":
-            client = str(arguments.get("client", "")).strip().lower()
-            if client not in SUPPORTED_MCP_CLIENTS:
-                allowed = "', '".join(SUPPORTED_MCP_CLIENTS)
-                raise MCPError(-32602, f"client must be one of '{allowed}'")
-            external_session_ref = arguments.get("external_session_ref")
-            active = self.store.get_active_session()
-            if active:
-                session_id = int(active["id"])
-                if external_session_ref:
-                    self.store.set_session_external_ref(session_id, str(external_session_ref))
-            else:
-                session_id = self.store.create_session(
-                    agent=client,
-                    external_session_ref=str(external_session_ref) if external_session_ref else None,
-                )
-            self.store.update_source_status(session_id, f"mcp:{client}", "available", f"started {utc_now()}")
-            return self._tool_text_result({"session_id": session_id})
-
-        if name == "stop_chat_session":
-            session_id = arguments.get("session_id")
-            if session_id is None:
-                raise MCPError(-32602, "session_id is required")
-            self.store.set_session_state(int(session_id), "stopped")
-            return self._tool_text_result({"stopped": True, "session_id": int(session_id)})
-
-        if name == "ping":
-            client = str(arguments.get("client", "")).strip().lower()
-            if client not in SUPPORTED_MCP_CLIENTS:
-                allowed = "', '".join(SUPPORTED_MCP_CLIENTS)
-                raise MCPError(-32602, f"client must be one of '{allowed}'")
+        return self._tool_raw_result(buf)
+
+    def _tool_raw_result(self, buf: bytes) -> bytes:
+        # Reuse the pre-serialized payload bytes for both the text block and
+        # structuredContent, so _write_message never re-walks the dict.
+        return (
+            b'{"content":[{"type":"text","text":'
+            + _json_dumps(buf.decode("utf-8"))
+            + b'}],"isError":false,"structuredContent":'
+            + buf
+            + b"}"
+        )
+
+    def _t_get_context(self, arguments: dict[str, Any]) -> dict[str, Any] | bytes:
+        max_events = int(arguments.get("max_events", 20))
+        if max_events < 1:
+            max_events = 1
+        if max_events > 100:
+            max_events = 100
+        include_effective_state = bool(arguments.get("include_effective_state", True))
+        snapshot = self.store.status_snapshot(recent_limit=max_events)
+        project = snapshot["project"]
+        # Encode events one at a time into a growing buffer rather than
+        # materializing an intermediate list of dicts for the whole response.
+        buf = bytearray(b'{"project":')
+        buf += _json_dumps(str(self.project_path))
+        buf += b',"last_updated_at":'
+        buf += _json_dumps(project["last_updated_at"] if project else None)
+        buf += b',"recent_events":['
+        # status_snapshot already shapes event rows as serializable dicts.
+        buf += b",".join(_json_dumps(row) for row in snapshot["events"])
+        buf += b'],"open_items":[],"style_signals":[]'
+        if include_effective_state:
+            buf += b',"effective_changed_files":%d' % int(snapshot.get("effective_changed_files", 0))
+        buf += b"}"
+        return self._tool_raw_result(bytes(buf))
+
+    def _t_append_event(self, arguments: dict[str, Any]) -> dict[str, Any] | bytes:
+        session_id = arguments.get("session_id")
+        if session_id is None:
             session_id = self._active_session_id()
-            if session_id is not None:
-                self.store.update_source_status(session_id, f"mcp:{client}", "available", f"heartbeat {utc_now()}")
-            return self._tool_text_result({"pong": True, "client": client, "session_id": session_id})
-
-        raise MCPError(-32601, f"Unknown tool: {name}")
-
-    def _tools_spec(self) -> list[dict[str, Any]]:
-        return [
-            {
-                "name": "get_context",
-                "description": "Fetch project context summary from local memory.",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "max_events": {"type": "integer", "minimum": 1, "maximum": 100, "default": 20},
-                        "include_effective_state": {"type": "boolean", "default": True},
-                    },
-                },
-            },
-            {
-                "name": "append_event",
-                "description": "Append summarized event into project memory.",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "event_type": {"type": "string"},
-                        "summary": {"type": "string"},
-                        "files_touched": {"type": "array", "items": {"type": "string"}},
-                        "decision": {"type": "boolean", "default": False},
-                        "tool_name": {"type": ["string", "null"]},
-                        "tool_result": {"type": ["string", "null"]},
-                        "source_detail": {"type": ["string", "null"]},
-                        "client": {
-                            "anyOf": [
-                                {"type": "string", "enum": list(SUPPORTED_MCP_CLIENTS)},
-                                {"type": "null"},
-                            ]
-                        },
-                        "session_id": {"type": ["integer", "null"]},
-                    },
-                    "required": ["summary"],
-                },
-            },
-            {
-                "name": "start_chat_session",
-                "description": "Start or attach to chat session for client.",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "client": {"type": "string", "enum": list(SUPPORTED_MCP_CLIENTS)},
-                        "external_session_ref": {"type": ["string", "null"]},
-                    },
-                    "required": ["client"],
-                },
-            },
-            {
-                "name": "stop_chat_session",
-                "description": "Stop session by id.",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {"session_id": {"type": "integer"}},
-                    "required": ["session_id"],
-                },
-            },
-            {
-                "name": "ping",
-                "description": "Heartbeat for MCP diagnostics.",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {"client": {"type": "string", "enum": list(SUPPORTED_MCP_CLIENTS)}},
-                    "required": ["client"],
-                },
-            },
-        ]
+        if session_id is None:
+            # Force a fresh lookup on the retry the error message asks for.
+            self._active_session_dirty = True
+            raise MCPError(-32010, "No active session. Run `ctx start` first.")
+
+        event_type, summary, files_touched, decision, tool_name, tool_result, client = (
+            _validate_append_event_args(arguments)
+        )
+        mcp_source = _MCP_SOURCES.get(client, "mcp:unknown")
+        source = mcp_source
+        source_detail = arguments.get("source_detail")
+        if source_detail:
+            source = f"{mcp_source}:{str(source_detail)[:40]}"
+
+        event_id = self.store.insert_event(
+            session_id=int(session_id),
+            event_type=event_type,
+            summary=summary,
+            files_touched=files_touched,
+            source=source,
+            tool_name=str(tool_name) if tool_name else None,
+            tool_result=str(tool_result) if tool_result else None,
+            decision_summary=summary if decision else None,
+        )
+        if client in _CLIENTS:
+            self.store.update_source_status(int(session_id), mcp_source, "available", f"heartbeat {utc_now()}")
+        return self._tool_text_result({"ok": True, "event_id": event_id, "session_id": int(session_id)})
+
+    def _t_start_chat_session(self, arguments: dict[str, Any]) -> dict[str, Any] | bytes:
+        client = _s(arguments.get("client")).lower()
+        if client not in _CLIENTS:
+            allowed = "', '".join(SUPPORTED_MCP_CLIENTS)
+            raise MCPError(-32602, f"client must be one of '{allowed}'")
+        external_session_ref = arguments.get("external_session_ref")
+        active = self.store.get_active_session()
+        if active:
+            session_id = int(active["id"])
+            if external_session_ref:
+                self.store.set_session_external_ref(session_id, str(external_session_ref))
+        else:
+            session_id = self.store.create_session(
+                agent=client,
+                external_session_ref=str(external_session_ref) if external_session_ref else None,
+            )
+        self.store.update_source_status(session_id, _MCP_SOURCES[client], "available", f"started {utc_now()}")
+        self._active_session_dirty = True
+        return self._tool_text_result({"session_id": session_id})
+
+    def _t_stop_chat_session(self, arguments: dict[str, Any]) -> dict[str, Any] | bytes:
+        session_id = arguments.get("session_id")
+        if session_id is None:
+            raise MCPError(-32602, "session_id is required")
+        self.store.set_session_state(int(session_id), "stopped")
+        self._active_session_dirty = True
+        return self._tool_text_result({"stopped": True, "session_id": int(session_id)})
+
+    def _t_ping(self, arguments: dict[str, Any]) -> dict[str, Any] | bytes:
+        client = _s(arguments.get("client")).lower()
+        if client not in _CLIENTS:
+            allowed = "', '".join(SUPPORTED_MCP_CLIENTS)
+            raise MCPError(-32602, f"client must be one of '{allowed}'")
+        session_id = self._active_session_id()
+        if session_id is not None:
+            self.store.update_source_status(session_id, _MCP_SOURCES[client], "available", f"heartbeat {utc_now()}")
+        return self._tool_text_result({"pong": True, "client": client, "session_id": session_id})
 
-    def _handle_request(self, request: dict[str, Any]) -> dict[str, Any] | None:
+    def _m_initialize(self, request_id: Any, params: dict[str, Any]) -> bytes:
+        result = {
+            "protocolVersion": "2024-11-05",
+            "serverInfo": {"name": "ctx-memory", "version": "0.1.0"},
+            "capabilities": {"tools": {}},
+        }
+        return self._jsonrpc_result(request_id, result)
+
+    def _m_ping(self, request_id: Any, params: dict[str, Any]) -> bytes:
+        return self._jsonrpc_result(request_id, {"ok": True})
+
+    def _m_tools_list(self, request_id: Any, params: dict[str, Any]) -> bytes:
+        return self._jsonrpc_result(request_id, _TOOLS_LIST_RESULT)
+
+    def _m_tools_call(self, request_id: Any, params: dict[str, Any]) -> bytes:
+        name = params.get("name")
+        arguments = params.get("arguments") or {}
+        if not isinstance(name, str):
+            raise MCPError(-32602, "tools/call requires tool name")
+        if not isinstance(arguments, dict):
+            raise MCPError(-32602, "tools/call arguments must be object")
+        tool = self._tool_dispatch.get(name)
+        if tool is None:
+            raise MCPError(-32601, f"Unknown tool: {name}")
+        return self._jsonrpc_result(request_id, tool(arguments))
+
+    def _m_initialized(self, request_id: Any, params: dict[str, Any]) -> None:
+        return None
+
+    def _handle_request(self, request: dict[str, Any]) -> bytes | None:
         method = request.get("method")
-        request_id = request.get("id")
-        params = request.get("params") or {}
-
-        if method == "notifications/initialized":
-            return None
-        if method == "initialize":
-            result = {
-                "protocolVersion": "2024-11-05",
-                "serverInfo": {"name": "ctx-memory", "version": "0.1.0"},
-                "capabilities": {"tools": {}},
-            }
-            return self._jsonrpc_result(request_id, result)
-        if method == "ping":
-            return self._jsonrpc_result(request_id, {"ok": True})
-        if method == "tools/list":
-            return self._jsonrpc_result(request_id, {"tools": self._tools_spec()})
-        if method == "tools/call":
-            name = params.get("name")
-            arguments = params.get("arguments") or {}
-            if not isinstance(name, str):
-                raise MCPError(-32602, "tools/call requires tool name")
-            if not isinstance(arguments, dict):
-                raise MCPError(-32602, "tools/call arguments must be object")
-            return self._jsonrpc_result(request_id, self._handle_tool(name, arguments))
-
-        raise MCPError(-32601, f"Method not found: {method}")
+        handler = self._method_dispatch.get(method)
+        if handler is None:
+            raise MCPError(-32601, f"Method not found: {method}")
+        return handler(request.get("id"), request.get("params") or {})
 
     def serve(self) -> int:
         while True:
+            request_id = None
             try:
                 message = self._read_message()
                 if message is None:
                     return 0
+                if message is _SKIPPED:
+                    continue
+                request_id = message.get("id")
                 response = self._handle_request(message)
-                if response is not None and message.get("id") is not None:
+                if response is not None and request_id is not None:
                     self._write_message(response)
             except MCPError as exc:
-                request_id = None
-                try:
-                    request_id = message.get("id") if isinstance(message, dict) else None
-                except Exception:  # noqa: BLE001
-                    request_id = None
                 self._write_message(self._jsonrpc_error(request_id, exc.code, exc.message))
             except Exception as exc:  # noqa: BLE001
                 self._write_message(self._jsonrpc_error(None, -32603, f"Internal error: {exc}"))
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
+import atexit
 import hashlib
-import json
+import os
+import queue
 import sqlite3
+import sys
+import threading
 import time
-from collections import Counter
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
@@ -22,7 +25,7 @@ from .constants import (
     PROJECT_MEMORY_DIR,
     SUMMARY_MAX_CHARS,
 )
-from .utils import directory_size_bytes, ensure_dir, normalize_path, normalize_summary, utc_now
+from .utils import ensure_dir, json_dumps, json_loads, normalize_path, normalize_summary, utc_now
 
 
 class StorageCapError(RuntimeError):
@@ -37,38 +40,201 @@ def project_memory_paths(project_path: Path) -> tuple[Path, Path, Path]:
     return root, db_path, logs_path
 
 
+# Hot-path SQL hoisted to module constants: sqlite3's statement cache keys on
+# the string object, so identical literals avoid re-parsing per call.
+_SQL_UPSERT_ADAPTER_OFFSET = (
+    "INSERT INTO adapter_offsets(session_id, adapter, log_path, byte_offset, updated_at) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(session_id, adapter, log_path) "
+    "DO UPDATE SET byte_offset = excluded.byte_offset, updated_at = excluded.updated_at"
+)
+_SQL_UPSERT_SOURCE_STATUS = (
+    "INSERT INTO source_status(session_id, source, status, detail, updated_at) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(session_id, source) "
+    "DO UPDATE SET status = excluded.status, detail = excluded.detail, updated_at = excluded.updated_at"
+)
+_SQL_UPSERT_HASH_HISTORY = (
+    "INSERT INTO file_hash_history(path, hash, first_seen_at, last_seen_at) "
+    "VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(path, hash) DO UPDATE SET last_seen_at = excluded.last_seen_at"
+)
+_SQL_SELECT_DEDUPE = (
+    "SELECT id, created_at, created_at_ms FROM events "
+    "WHERE session_id = ? AND dedupe_hash = ? "
+    "ORDER BY created_at DESC LIMIT 1"
+)
+_SQL_INSERT_EVENT = (
+    "INSERT INTO events(project_id, session_id, event_type, summary, files_touched_json, "
+    "before_hash, after_hash, reverted_event_id, reverted_by_event_id, "
+    "is_effective, source, created_at, created_at_ms, updated_at, dedupe_hash) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_EVENT_RETURNING = _SQL_INSERT_EVENT + " RETURNING id"
+# RETURNING (SQLite >= 3.35) hands back the new id with the insert itself;
+# older runtimes fall back to cursor.lastrowid.
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_SQL_INSERT_TOOL_USAGE = (
+    "INSERT INTO tool_usage(project_id, session_id, event_id, tool_name, purpose, result, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_DECISION = (
+    "INSERT INTO decisions(project_id, session_id, event_id, summary, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_SQL_BUMP_CHANGED_FILES = (
+    "INSERT INTO status_counters(project_id, changed_files, updated_at) VALUES (?, ?, ?) "
+    "ON CONFLICT(project_id) DO UPDATE SET "
+    "changed_files = changed_files + excluded.changed_files, updated_at = excluded.updated_at"
+)
+_SQL_RECOUNT_CHANGED_FILES = (
+    "INSERT INTO status_counters(project_id, changed_files, updated_at) "
+    "VALUES (?, (SELECT COUNT(*) FROM file_state WHERE is_clean = 0), ?) "
+    "ON CONFLICT(project_id) DO UPDATE SET "
+    "changed_files = excluded.changed_files, updated_at = excluded.updated_at"
+)
+_SQL_TOUCH_SESSION = "UPDATE sessions SET last_updated_at = ? WHERE id = ?"
+_SQL_TOUCH_PROJECT = "UPDATE projects SET last_updated_at = ?, updated_at = ? WHERE id = ?"
+_SQL_UPDATE_STORAGE = "UPDATE projects SET storage_used_bytes = ?, updated_at = ? WHERE id = ?"
+# HIGH_VALUE_EVENT_TYPES is static, so the placeholder list is too.
+_HIGH_VALUE_PLACEHOLDERS = ",".join("?" for _ in HIGH_VALUE_EVENT_TYPES)
+
+# Columns added after the original events schema shipped, applied to older
+# databases in one transaction by _init_db.
+_EVENT_COLUMN_MIGRATIONS = {
+    "before_hash": "ALTER TABLE events ADD COLUMN before_hash TEXT",
+    "after_hash": "ALTER TABLE events ADD COLUMN after_hash TEXT",
+    "reverted_event_id": "ALTER TABLE events ADD COLUMN reverted_event_id INTEGER",
+    "reverted_by_event_id": "ALTER TABLE events ADD COLUMN reverted_by_event_id INTEGER",
+    "is_effective": "ALTER TABLE events ADD COLUMN is_effective INTEGER NOT NULL DEFAULT 1",
+    "summarized_at": "ALTER TABLE events ADD COLUMN summarized_at TEXT",
+    "created_at_ms": "ALTER TABLE events ADD COLUMN created_at_ms INTEGER",
+}
+
+_DEDUPE_WINDOW_MS = DEDUPE_WINDOW_SECONDS * 1000
+
+
 class ProjectStore:
     def __init__(self, project_path: Path):
         self.project_path = normalize_path(project_path)
         self.memory_root, self.db_path, self.logs_path = project_memory_paths(self.project_path)
         ensure_dir(self.memory_root)
         ensure_dir(self.logs_path)
+        self._local = threading.local()
+        self._storage_cache: tuple[float, int] | None = None
+        self._inserts_since_storage_check = 0
+        self._log_day_epoch = 0
+        self._log_target: Path | None = None
+        self._log_handle = None
+        self._log_handle_target: Path | None = None
+        self._log_queue: queue.Queue = queue.Queue()
+        self._log_writer = threading.Thread(
+            target=self._drain_event_log, name="ctx-event-log", daemon=True
+        )
+        self._log_writer.start()
+        # Short-lived CLI processes may exit before the writer wakes up.
+        atexit.register(self._flush_event_log)
+        self._touch_state: dict[int, tuple[int, float]] = {}
+        self._project_id: int | None = None
+        self._project_root_prefix = self.project_path.as_posix().rstrip("/") + "/"
+        self._write_q: queue.Queue = queue.Queue()
+        self._write_worker = threading.Thread(
+            target=self._writer_loop, name="ctx-db-writer", daemon=True
+        )
+        self._write_worker.start()
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path, timeout=30)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA synchronous=NORMAL")
+        # One cached connection per thread: the WAL/synchronous pragmas run
+        # once instead of on every call. `with conn:` only scopes transactions,
+        # so existing callers keep the connection alive.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # cached_statements keys on the SQL string, pairing with the
+            # module-level _SQL_* constants so hot statements parse once.
+            if threading.current_thread() is self._write_worker:
+                conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=256)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            else:
+                # Everything outside the writer thread only reads; a
+                # read-only connection makes that explicit and can never
+                # take the write lock. WAL is a database property, so the
+                # journal pragmas are the writer's job.
+                conn = sqlite3.connect(
+                    f"file:{self.db_path}?mode=ro",
+                    uri=True,
+                    timeout=30,
+                    cached_statements=256,
+                )
+            conn.row_factory = sqlite3.Row
+            # Canonical safe-under-WAL tuning: in-memory temp tables, a 64 MiB
+            # page cache, and mmap-backed reads (skipped on 32-bit builds).
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-65536")
+            if sys.maxsize > 2**32:
+                conn.execute("PRAGMA mmap_size=1073741824")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
         return conn
 
-    def _execute_retry(self, fn):
-        retries = 8
-        delay = 0.05
-        for attempt in range(retries):
+    def _run_write(self, fn):
+        """Run a mutating closure on the dedicated writer thread.
+
+        WAL mode allows many readers but one writer; funneling every write
+        through a single thread (and thus a single connection) means threads
+        never contend for the write lock. Reads keep using the per-thread
+        cached connections.
+        """
+        if threading.current_thread() is self._write_worker:
+            return fn()
+        reply: queue.Queue = queue.Queue(maxsize=1)
+        self._write_q.put((fn, reply))
+        ok, value = reply.get()
+        if ok:
+            return value
+        raise value
+
+    def _writer_loop(self) -> None:
+        while True:
+            fn, reply = self._write_q.get()
             try:
-                return fn()
-            except sqlite3.OperationalError as exc:
-                if "locked" not in str(exc).lower() or attempt == retries - 1:
-                    raise
-                time.sleep(delay)
-                delay *= 2
-        return fn()
+                reply.put((True, fn()))
+            except BaseException as exc:  # noqa: BLE001 - relayed to the caller
+                reply.put((False, exc))
+
+    def close(self) -> None:
+        self._flush_event_log()
+        if self._log_handle is not None:
+            try:
+                self._log_handle.close()
+            except OSError:
+                pass
+            self._log_handle = None
+            self._log_handle_target = None
+
+        def _close_writer():
+            conn = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.close()
+                self._local.conn = None
+
+        self._run_write(_close_writer)
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
 
     def _init_db(self) -> None:
         def _init():
             now = utc_now()
             with self._connect() as conn:
+                # Incremental auto-vacuum lets quota enforcement reclaim freed
+                # pages without a full VACUUM. The mode only sticks on a fresh
+                # database; converting an existing one needs a one-time VACUUM.
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                    conn.execute("VACUUM")
                 conn.executescript(
                     """
                     CREATE TABLE IF NOT EXISTS projects (
@@ -111,6 +277,7 @@ class ProjectStore:
                         summarized_at TEXT,
                         source TEXT NOT NULL,
                         created_at TEXT NOT NULL,
+                        created_at_ms INTEGER,
                         updated_at TEXT NOT NULL,
                         dedupe_hash TEXT NOT NULL,
                         FOREIGN KEY(project_id) REFERENCES projects(id),
@@ -208,35 +375,46 @@ class ProjectStore:
                         PRIMARY KEY(path, hash)
                     );
 
+                    CREATE TABLE IF NOT EXISTS status_counters (
+                        project_id INTEGER PRIMARY KEY,
+                        changed_files INTEGER NOT NULL DEFAULT 0,
+                        updated_at TEXT
+                    );
+
                     CREATE INDEX IF NOT EXISTS idx_events_session_created
                         ON events(session_id, created_at DESC);
-                    CREATE INDEX IF NOT EXISTS idx_events_dedupe_hash
-                        ON events(dedupe_hash, created_at DESC);
+                    DROP INDEX IF EXISTS idx_events_dedupe_hash;
+                    DROP INDEX IF EXISTS idx_events_session_dedupe;
+                    CREATE INDEX IF NOT EXISTS idx_events_session_dedupe_ms
+                        ON events(session_id, dedupe_hash, created_at DESC, created_at_ms);
                     CREATE INDEX IF NOT EXISTS idx_events_type_created
                         ON events(event_type, created_at DESC);
+                    CREATE INDEX IF NOT EXISTS idx_events_type_id
+                        ON events(event_type, id DESC);
                     CREATE INDEX IF NOT EXISTS idx_events_revert_summary
                         ON events(event_type, summarized_at, created_at DESC);
                     CREATE INDEX IF NOT EXISTS idx_file_state_clean
                         ON file_state(is_clean, updated_at DESC);
                     """
                 )
-                # Forward-compatible migration for older DBs.
+                # Forward-compatible migration for older DBs. Fresh databases
+                # already have every column, so the common case is a single
+                # pragma scan with no schema writes; stragglers get all their
+                # ALTERs under one transaction (one schema-cookie bump).
                 event_columns = {
                     row["name"]
                     for row in conn.execute("PRAGMA table_info(events)").fetchall()
                 }
-                if "before_hash" not in event_columns:
-                    conn.execute("ALTER TABLE events ADD COLUMN before_hash TEXT")
-                if "after_hash" not in event_columns:
-                    conn.execute("ALTER TABLE events ADD COLUMN after_hash TEXT")
-                if "reverted_event_id" not in event_columns:
-                    conn.execute("ALTER TABLE events ADD COLUMN reverted_event_id INTEGER")
-                if "reverted_by_event_id" not in event_columns:
-                    conn.execute("ALTER TABLE events ADD COLUMN reverted_by_event_id INTEGER")
-                if "is_effective" not in event_columns:
-                    conn.execute("ALTER TABLE events ADD COLUMN is_effective INTEGER NOT NULL DEFAULT 1")
-                if "summarized_at" not in event_columns:
-                    conn.execute("ALTER TABLE events ADD COLUMN summarized_at TEXT")
+                pending = [
+                    ddl
+                    for column, ddl in _EVENT_COLUMN_MIGRATIONS.items()
+                    if column not in event_columns
+                ]
+                if pending:
+                    conn.execute("BEGIN IMMEDIATE")
+                    for ddl in pending:
+                        conn.execute(ddl)
+                    conn.commit()
 
                 conn.execute(
                     """
@@ -247,8 +425,16 @@ class ProjectStore:
                     """,
                     (str(self.project_path), now, now, now, DEFAULT_CAP_BYTES),
                 )
+                # Seed (or self-heal) the materialized counter from the
+                # authoritative table once per store lifetime.
+                conn.execute(
+                    _SQL_RECOUNT_CHANGED_FILES, (self.get_project_id(conn), now)
+                )
+                # Refresh planner statistics when SQLite deems it worthwhile;
+                # cheaper than an unconditional ANALYZE on every open.
+                conn.execute("PRAGMA optimize")
 
-        self._execute_retry(_init)
+        self._run_write(_init)
 
     def set_project_metadata(self, display_name: str | None, recording_state: str) -> None:
         now = utc_now()
@@ -267,7 +453,7 @@ class ProjectStore:
                     (display, recording_state, now, str(self.project_path)),
                 )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def set_project_deleted(self, deleted: bool) -> None:
         now = utc_now()
@@ -286,7 +472,7 @@ class ProjectStore:
                     (deleted_at, deleted_at, now, str(self.project_path)),
                 )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def update_storage(self, used_bytes: int) -> None:
         now = utc_now()
@@ -303,20 +489,26 @@ class ProjectStore:
                     (int(used_bytes), now, str(self.project_path)),
                 )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def get_project_row(self):
         def _read():
             with self._connect() as conn:
                 return conn.execute("SELECT * FROM projects WHERE path = ?", (str(self.project_path),)).fetchone()
 
-        return self._execute_retry(_read)
+        return _read()
 
     def get_project_id(self, conn: sqlite3.Connection) -> int:
-        row = conn.execute("SELECT id FROM projects WHERE path = ?", (str(self.project_path),)).fetchone()
-        if row is None:
-            raise RuntimeError("project row missing")
-        return int(row["id"])
+        # The project row is created in _init_db and its id never changes for
+        # the lifetime of this store, so one lookup suffices.
+        if self._project_id is None:
+            row = conn.execute(
+                "SELECT id FROM projects WHERE path = ?", (str(self.project_path),)
+            ).fetchone()
+            if row is None:
+                raise RuntimeError("project row missing")
+            self._project_id = int(row["id"])
+        return self._project_id
 
     def create_session(self, agent: str, external_session_ref: str | None = None) -> int:
         now = utc_now()
@@ -344,14 +536,14 @@ class ProjectStore:
                 )
                 return session_id
 
-        return self._execute_retry(_create)
+        return self._run_write(_create)
 
     def get_session(self, session_id: int):
         def _read():
             with self._connect() as conn:
                 return conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
 
-        return self._execute_retry(_read)
+        return _read()
 
     def get_active_session(self):
         def _read():
@@ -365,7 +557,7 @@ class ProjectStore:
                     """
                 ).fetchone()
 
-        return self._execute_retry(_read)
+        return _read()
 
     def get_latest_session(self):
         def _read():
@@ -378,7 +570,7 @@ class ProjectStore:
                     """
                 ).fetchone()
 
-        return self._execute_retry(_read)
+        return _read()
 
     def list_sessions(self, limit: int = 50):
         safe_limit = max(1, min(int(limit), 500))
@@ -395,7 +587,7 @@ class ProjectStore:
                     (safe_limit,),
                 ).fetchall()
 
-        return self._execute_retry(_read)
+        return _read()
 
     def set_session_external_ref(self, session_id: int, external_session_ref: str) -> None:
         now = utc_now()
@@ -411,14 +603,14 @@ class ProjectStore:
                     (external_session_ref, now, session_id),
                 )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def _decode_files_touched(self, files_json: str | None) -> list[str]:
         if not files_json:
             return []
         try:
-            parsed = json.loads(files_json)
-        except json.JSONDecodeError:
+            parsed = json_loads(files_json)
+        except ValueError:
             return []
         if not isinstance(parsed, list):
             return []
@@ -492,6 +684,7 @@ class ProjectStore:
                 """,
                 (path, current, baseline, last_event_id, 1 if current == baseline else 0, now),
             )
+        conn.execute(_SQL_RECOUNT_CHANGED_FILES, (self.get_project_id(conn), now))
 
     def delete_session(self, session_id: int) -> bool:
         now = utc_now()
@@ -525,6 +718,7 @@ class ProjectStore:
                     """,
                     (now, now, project_id),
                 )
+                self._storage_cache = None
                 used = self._storage_usage()
                 conn.execute(
                     """
@@ -536,7 +730,7 @@ class ProjectStore:
                 )
                 return True
 
-        return bool(self._execute_retry(_delete))
+        return bool(self._run_write(_delete))
 
     def resume_session(self, session_id: int) -> None:
         now = utc_now()
@@ -564,7 +758,7 @@ class ProjectStore:
                     (now, now, str(self.project_path)),
                 )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def set_session_state(self, session_id: int, state: str) -> None:
         now = utc_now()
@@ -589,6 +783,7 @@ class ProjectStore:
                         """,
                         (now, now, str(self.project_path)),
                     )
+                    self._touch_state.pop(session_id, None)
                 else:
                     conn.execute(
                         """
@@ -608,7 +803,7 @@ class ProjectStore:
                             (now, str(self.project_path)),
                         )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def get_session_state(self, session_id: int) -> str | None:
         def _read():
@@ -616,7 +811,7 @@ class ProjectStore:
                 row = conn.execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()
                 return row["state"] if row else None
 
-        return self._execute_retry(_read)
+        return _read()
 
     def set_feature(self, key: str, value: str) -> None:
         now = utc_now()
@@ -632,7 +827,7 @@ class ProjectStore:
                     (key, value, now),
                 )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def get_adapter_offset(self, session_id: int, adapter: str, log_path: str) -> int:
         def _read():
@@ -646,7 +841,7 @@ class ProjectStore:
                 ).fetchone()
                 return int(row["byte_offset"]) if row else 0
 
-        return self._execute_retry(_read)
+        return _read()
 
     def set_adapter_offset(self, session_id: int, adapter: str, log_path: str, offset: int) -> None:
         now = utc_now()
@@ -654,16 +849,11 @@ class ProjectStore:
         def _write():
             with self._connect() as conn:
                 conn.execute(
-                    """
-                    INSERT INTO adapter_offsets(session_id, adapter, log_path, byte_offset, updated_at)
-                    VALUES (?, ?, ?, ?, ?)
-                    ON CONFLICT(session_id, adapter, log_path)
-                    DO UPDATE SET byte_offset = excluded.byte_offset, updated_at = excluded.updated_at
-                    """,
+                    _SQL_UPSERT_ADAPTER_OFFSET,
                     (session_id, adapter, log_path, int(offset), now),
                 )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def update_source_status(self, session_id: int, source: str, status: str, detail: str | None) -> None:
         now = utc_now()
@@ -671,42 +861,38 @@ class ProjectStore:
         def _write():
             with self._connect() as conn:
                 conn.execute(
-                    """
-                    INSERT INTO source_status(session_id, source, status, detail, updated_at)
-                    VALUES (?, ?, ?, ?, ?)
-                    ON CONFLICT(session_id, source)
-                    DO UPDATE SET status = excluded.status, detail = excluded.detail, updated_at = excluded.updated_at
-                    """,
+                    _SQL_UPSERT_SOURCE_STATUS,
                     (session_id, source, status, detail, now),
                 )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def initialize_file_state(self, snapshot_hashes: dict[str, str]) -> None:
         now = utc_now()
 
         def _write():
+            # One executemany per table instead of two statements per path;
+            # the whole snapshot lands in a single transaction.
             with self._connect() as conn:
-                for path, file_hash in snapshot_hashes.items():
-                    conn.execute(
-                        """
-                        INSERT INTO file_state(path, current_hash, baseline_hash, last_event_id, is_clean, updated_at)
-                        VALUES (?, ?, ?, NULL, 1, ?)
-                        ON CONFLICT(path) DO NOTHING
-                        """,
-                        (path, file_hash, file_hash, now),
-                    )
-                    conn.execute(
-                        """
-                        INSERT INTO file_hash_history(path, hash, first_seen_at, last_seen_at)
-                        VALUES (?, ?, ?, ?)
-                        ON CONFLICT(path, hash)
-                        DO UPDATE SET last_seen_at = excluded.last_seen_at
-                        """,
-                        (path, file_hash, now, now),
-                    )
+                conn.executemany(
+                    """
+                    INSERT INTO file_state(path, current_hash, baseline_hash, last_event_id, is_clean, updated_at)
+                    VALUES (?, ?, ?, NULL, 1, ?)
+                    ON CONFLICT(path) DO NOTHING
+                    """,
+                    [(path, file_hash, file_hash, now) for path, file_hash in snapshot_hashes.items()],
+                )
+                conn.executemany(
+                    """
+                    INSERT INTO file_hash_history(path, hash, first_seen_at, last_seen_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(path, hash)
+                    DO UPDATE SET last_seen_at = excluded.last_seen_at
+                    """,
+                    [(path, file_hash, now, now) for path, file_hash in snapshot_hashes.items()],
+                )
 
-        self._execute_retry(_write)
+        self._run_write(_write)
 
     def _upsert_hash_history(
         self,
@@ -715,15 +901,22 @@ class ProjectStore:
         file_hash: str,
         now: str,
     ) -> None:
-        conn.execute(
-            """
-            INSERT INTO file_hash_history(path, hash, first_seen_at, last_seen_at)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(path, hash)
-            DO UPDATE SET last_seen_at = excluded.last_seen_at
-            """,
-            (path, file_hash, now, now),
-        )
+        conn.execute(_SQL_UPSERT_HASH_HISTORY, (path, file_hash, now, now))
+
+    def _touch_timestamps(
+        self, conn: sqlite3.Connection, session_id: int, project_id: int, now: str
+    ) -> None:
+        # last_updated_at is advisory freshness, not ledger data; bumping it
+        # on every event doubles the statements per insert, so throttle to
+        # once per 5 seconds or 50 events per session. Session stop writes
+        # its own timestamps, which clears any staleness left behind.
+        count, last = self._touch_state.get(session_id, (0, 0.0))
+        if count < 50 and time.monotonic() - last < 5.0:
+            self._touch_state[session_id] = (count + 1, last)
+            return
+        conn.execute(_SQL_TOUCH_SESSION, (now, session_id))
+        conn.execute(_SQL_TOUCH_PROJECT, (now, now, project_id))
+        self._touch_state[session_id] = (0, time.monotonic())
 
     def _is_seen_hash(self, conn: sqlite3.Connection, path: str, file_hash: str) -> bool:
         row = conn.execute(
@@ -733,14 +926,89 @@ class ProjectStore:
         return row is not None
 
     def _append_event_log(self, payload: dict) -> None:
-        day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        target = self.logs_path / f"events-{day}.jsonl"
-        line = json.dumps(payload, separators=(",", ":"), ensure_ascii=True)
-        with target.open("a", encoding="utf-8") as handle:
-            handle.write(line + "\n")
+        # Writes are drained by a background thread so the insert path never
+        # pays the open/write/close syscalls itself.
+        self._log_queue.put(payload)
+
+    def _drain_event_log(self) -> None:
+        while True:
+            batch = [self._log_queue.get()]
+            deadline = time.monotonic() + 0.05
+            while len(batch) < 256:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._log_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write_event_log(batch)
+            finally:
+                for _ in batch:
+                    self._log_queue.task_done()
+
+    def _log_target_for_now(self) -> Path:
+        # Recompute the day string (and the Path it feeds) only when the
+        # UTC day actually changes; an integer divide replaces strftime on
+        # every other write.
+        day_epoch = int(time.time()) // 86400
+        if day_epoch != self._log_day_epoch:
+            self._log_day_epoch = day_epoch
+            day = time.strftime("%Y-%m-%d", time.gmtime(day_epoch * 86400))
+            self._log_target = self.logs_path / f"events-{day}.jsonl"
+        return self._log_target
+
+    def _write_event_log(self, batch: list[dict]) -> None:
+        # Only the log-writer thread touches the handle, so no lock is
+        # needed. O_APPEND keeps concurrent processes append-safe, and the
+        # handle stays open until the day rolls over or the store closes.
+        target = self._log_target_for_now()
+        lines = "".join(
+            json_dumps(payload) + "\n"
+            for payload in batch
+        )
+        try:
+            if self._log_handle is None or self._log_handle_target != target:
+                if self._log_handle is not None:
+                    self._log_handle.close()
+                self._log_handle = target.open("a", encoding="utf-8")
+                self._log_handle_target = target
+            self._log_handle.write(lines)
+            self._log_handle.flush()
+        except OSError:
+            pass
+
+    def _flush_event_log(self) -> None:
+        if self._log_writer.is_alive():
+            self._log_queue.join()
 
     def _storage_usage(self) -> int:
-        return directory_size_bytes(self.memory_root)
+        # The database dominates storage, so size it from one PRAGMA pair
+        # instead of walking the whole memory directory; log files are the
+        # only other contributors. Cached briefly because insert paths ask
+        # for this on every event.
+        cached = self._storage_cache
+        if cached is not None and time.monotonic() - cached[0] < 5.0:
+            return cached[1]
+        conn = self._connect()
+        page_count = int(conn.execute("PRAGMA page_count").fetchone()[0])
+        page_size = int(conn.execute("PRAGMA page_size").fetchone()[0])
+        total = page_count * page_size
+        # Under WAL the sidecar files can hold a checkpoint's worth of
+        # frames that page_count does not see.
+        for suffix in ("-wal", "-shm"):
+            try:
+                total += os.stat(f"{self.db_path}{suffix}").st_size
+            except OSError:
+                pass
+        for entry in self.logs_path.glob("events-*.jsonl"):
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                continue
+        self._storage_cache = (time.monotonic(), total)
+        return total
 
     def _project_cap(self, conn: sqlite3.Connection) -> int:
         row = conn.execute(
@@ -754,38 +1022,54 @@ class ProjectStore:
     def compact(self, conn: sqlite3.Connection) -> None:
         threshold = datetime.now(timezone.utc) - timedelta(days=1)
         threshold_iso = threshold.replace(microsecond=0).isoformat().replace("+00:00", "Z")
-        placeholders = ",".join("?" for _ in HIGH_VALUE_EVENT_TYPES)
-        rows = conn.execute(
+        # Materialize the victim set once so the aggregation and the delete
+        # see the same rows without pulling 3000 of them into Python.
+        conn.execute("DROP TABLE IF EXISTS temp.compact_victims")
+        conn.execute(
             f"""
+            CREATE TEMP TABLE compact_victims AS
             SELECT id, event_type, created_at
             FROM events
-            WHERE event_type NOT IN ({placeholders})
+            WHERE event_type NOT IN ({_HIGH_VALUE_PLACEHOLDERS})
               AND created_at < ?
             ORDER BY created_at
             LIMIT 3000
             """,
             (*HIGH_VALUE_EVENT_TYPES, threshold_iso),
-        ).fetchall()
-        if not rows:
-            return
-
-        counts = Counter(row["event_type"] for row in rows)
-        period_start = rows[0]["created_at"]
-        period_end = rows[-1]["created_at"]
-        counts_summary = ", ".join(f"{k}:{v}" for k, v in sorted(counts.items()))
-        summary = f"Compacted {len(rows)} low-value events ({counts_summary})."
-        project_id = self.get_project_id(conn)
-        now = utc_now()
-        conn.execute(
-            """
-            INSERT INTO rollups(project_id, period_start, period_end, summary, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (project_id, period_start, period_end, summary, now),
         )
-        ids = [row["id"] for row in rows]
-        placeholder_ids = ",".join("?" for _ in ids)
-        conn.execute(f"DELETE FROM events WHERE id IN ({placeholder_ids})", ids)
+        try:
+            stats = conn.execute(
+                """
+                SELECT COUNT(*) AS total,
+                       MIN(created_at) AS period_start,
+                       MAX(created_at) AS period_end
+                FROM compact_victims
+                """
+            ).fetchone()
+            if not stats["total"]:
+                return
+            counts = conn.execute(
+                """
+                SELECT event_type, COUNT(*) AS n
+                FROM compact_victims
+                GROUP BY event_type
+                ORDER BY event_type
+                """
+            ).fetchall()
+            counts_summary = ", ".join(f"{row['event_type']}:{row['n']}" for row in counts)
+            summary = f"Compacted {stats['total']} low-value events ({counts_summary})."
+            project_id = self.get_project_id(conn)
+            now = utc_now()
+            conn.execute(
+                """
+                INSERT INTO rollups(project_id, period_start, period_end, summary, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (project_id, stats["period_start"], stats["period_end"], summary, now),
+            )
+            conn.execute("DELETE FROM events WHERE id IN (SELECT id FROM compact_victims)")
+        finally:
+            conn.execute("DROP TABLE compact_victims")
 
     def _enforce_quota(self, conn: sqlite3.Connection) -> None:
         cap = self._project_cap(conn)
@@ -793,7 +1077,10 @@ class ProjectStore:
         if used >= int(cap * COMPACTION_THRESHOLD_RATIO):
             self.compact(conn)
             conn.commit()
-            conn.execute("VACUUM")
+            # Reclaims only the pages compaction freed; a full VACUUM would
+            # rewrite the database under an exclusive lock.
+            conn.execute("PRAGMA incremental_vacuum(1000)")
+            self._storage_cache = None
             used = self._storage_usage()
         conn.execute(
             """
@@ -808,6 +1095,48 @@ class ProjectStore:
                 f"Project storage cap exceeded ({used} bytes >= {cap} bytes)."
             )
 
+    def _sanitize_files(self, files_touched: list[str] | None) -> list[str]:
+        # Pure string handling: no Path allocations, no resolve()
+        # syscalls, and no exception-driven control flow per item.
+        if not files_touched:
+            return []
+        root_prefix = self._project_root_prefix
+        sanitized = set()
+        for item in files_touched:
+            raw = str(item).strip()
+            if not raw:
+                continue
+            if os.sep != "/":
+                raw = raw.replace(os.sep, "/")
+            if raw.startswith(root_prefix):
+                raw = raw[len(root_prefix):]
+            elif not raw.startswith("/"):
+                raw = os.path.normpath(raw).replace(os.sep, "/")
+                if raw == ".":
+                    continue
+            sanitized.add(raw)
+        return sorted(sanitized)
+
+    @staticmethod
+    def _dedupe_hash(
+        safe_type: str,
+        safe_summary: str,
+        files: list[str],
+        before_hash: str | None,
+        after_hash: str | None,
+        reverted_event_id: int | None,
+        is_effective: int,
+    ) -> str:
+        dedupe_basis = (
+            f"{safe_type}|{safe_summary.lower()}|{','.join(files)}|"
+            f"{before_hash or ''}|{after_hash or ''}|{reverted_event_id or ''}|{is_effective}"
+        )
+        # The dedupe hash is a local correctness token, not a security
+        # primitive; blake2b with a 16-byte digest is the cheapest option in
+        # the stdlib. Old SHA-256 rows simply never match new hashes, which
+        # only re-opens the short dedupe window once across the upgrade.
+        return hashlib.blake2b(dedupe_basis.encode("utf-8"), digest_size=16).hexdigest()
+
     def _insert_event_with_conn(
         self,
         conn: sqlite3.Connection,
@@ -833,115 +1162,60 @@ class ProjectStore:
         if not safe_summary:
             raise ValueError("summary cannot be empty")
 
-        files: list[str] = []
-        if files_touched:
-            sanitized = set()
-            for item in files_touched:
-                raw = str(item).strip()
-                if not raw:
-                    continue
-                path_obj = Path(raw)
-                if path_obj.is_absolute():
-                    sanitized.add(path_obj.as_posix())
-                    continue
-                try:
-                    resolved = normalize_path(self.project_path / raw)
-                    rel = resolved.relative_to(self.project_path)
-                    sanitized.add(rel.as_posix())
-                except Exception:
-                    sanitized.add(path_obj.as_posix())
-            files = sorted(sanitized)
-        files_json = json.dumps(files, separators=(",", ":"), ensure_ascii=True)
-        dedupe_basis = (
-            f"{safe_type}|{safe_summary.lower()}|{','.join(files)}|"
-            f"{before_hash or ''}|{after_hash or ''}|{reverted_event_id or ''}|{is_effective}"
+        files = self._sanitize_files(files_touched)
+        files_json = json_dumps(files)
+        dedupe_hash = self._dedupe_hash(
+            safe_type, safe_summary, files, before_hash, after_hash,
+            reverted_event_id, is_effective,
         )
-        dedupe_hash = hashlib.sha256(dedupe_basis.encode("utf-8")).hexdigest()
-        now_dt = datetime.fromisoformat(now.replace("Z", "+00:00"))
+        now_ms = time.time_ns() // 1_000_000
         project_id = self.get_project_id(conn)
-        existing = conn.execute(
-            """
-            SELECT id, created_at
-            FROM events
-            WHERE session_id = ? AND dedupe_hash = ?
-            ORDER BY created_at DESC
-            LIMIT 1
-            """,
-            (session_id, dedupe_hash),
-        ).fetchone()
+        existing = conn.execute(_SQL_SELECT_DEDUPE, (session_id, dedupe_hash)).fetchone()
         if existing:
-            created = datetime.fromisoformat(existing["created_at"].replace("Z", "+00:00"))
-            if (now_dt - created).total_seconds() <= DEDUPE_WINDOW_SECONDS:
+            created_ms = existing["created_at_ms"]
+            if created_ms is None:
+                # Rows written before the created_at_ms column existed.
+                created = datetime.fromisoformat(existing["created_at"].replace("Z", "+00:00"))
+                created_ms = int(created.timestamp() * 1000)
+            if now_ms - created_ms <= _DEDUPE_WINDOW_MS:
                 conn.execute(
                     "UPDATE events SET updated_at = ? WHERE id = ?",
                     (now, existing["id"]),
                 )
-                conn.execute(
-                    "UPDATE sessions SET last_updated_at = ? WHERE id = ?",
-                    (now, session_id),
-                )
-                conn.execute(
-                    """
-                    UPDATE projects
-                    SET last_updated_at = ?, updated_at = ?
-                    WHERE id = ?
-                    """,
-                    (now, now, project_id),
-                )
+                self._touch_timestamps(conn, session_id, project_id, now)
                 return int(existing["id"])
 
-        cursor = conn.execute(
-            """
-            INSERT INTO events(project_id, session_id, event_type, summary, files_touched_json,
-                               before_hash, after_hash, reverted_event_id, reverted_by_event_id,
-                               is_effective, source, created_at, updated_at, dedupe_hash)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?, ?, ?, ?, ?)
-            """,
-            (
-                project_id,
-                session_id,
-                safe_type,
-                safe_summary,
-                files_json,
-                before_hash,
-                after_hash,
-                reverted_event_id,
-                int(is_effective),
-                source,
-                now,
-                now,
-                dedupe_hash,
-            ),
+        params = (
+            project_id,
+            session_id,
+            safe_type,
+            safe_summary,
+            files_json,
+            before_hash,
+            after_hash,
+            reverted_event_id,
+            int(is_effective),
+            source,
+            now,
+            now_ms,
+            now,
+            dedupe_hash,
         )
-        event_id = int(cursor.lastrowid)
+        if _HAS_RETURNING:
+            event_id = int(conn.execute(_SQL_INSERT_EVENT_RETURNING, params).fetchone()["id"])
+        else:
+            event_id = int(conn.execute(_SQL_INSERT_EVENT, params).lastrowid)
         if tool_name:
             conn.execute(
-                """
-                INSERT INTO tool_usage(project_id, session_id, event_id, tool_name, purpose, result, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
+                _SQL_INSERT_TOOL_USAGE,
                 (project_id, session_id, event_id, tool_name, tool_purpose, tool_result, now),
             )
         if safe_type == "decision_made" or decision_summary:
             conn.execute(
-                """
-                INSERT INTO decisions(project_id, session_id, event_id, summary, created_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
+                _SQL_INSERT_DECISION,
                 (project_id, session_id, event_id, decision_summary or safe_summary, now),
             )
-        conn.execute(
-            "UPDATE sessions SET last_updated_at = ? WHERE id = ?",
-            (now, session_id),
-        )
-        conn.execute(
-            """
-            UPDATE projects
-            SET last_updated_at = ?, updated_at = ?
-            WHERE id = ?
-            """,
-            (now, now, project_id),
-        )
+        self._touch_timestamps(conn, session_id, project_id, now)
         payload = {
             "event_id": event_id,
             "session_id": session_id,
@@ -955,15 +1229,12 @@ class ProjectStore:
             "created_at": now,
         }
         self._append_event_log(payload)
+        self._inserts_since_storage_check += 1
+        if self._inserts_since_storage_check >= 1000:
+            self._inserts_since_storage_check = 0
+            self._storage_cache = None
         used = self._storage_usage()
-        conn.execute(
-            """
-            UPDATE projects
-            SET storage_used_bytes = ?, updated_at = ?
-            WHERE id = ?
-            """,
-            (used, now, project_id),
-        )
+        conn.execute(_SQL_UPDATE_STORAGE, (used, now, project_id))
         return event_id
 
     def insert_event(
@@ -1005,7 +1276,137 @@ class ProjectStore:
                     is_effective=is_effective,
                 )
 
-        return self._execute_retry(_insert)
+        return self._run_write(_insert)
+
+    def insert_events_bulk(self, session_id: int, events: list[dict], source: str) -> list[int]:
+        """Insert a burst of events inside one transaction.
+
+        Preferred over repeated insert_event when an adapter catches up on a
+        backlog: one commit covers the whole batch, dedupe hashes are checked
+        with a single SELECT, and the main INSERT uses executemany. Returns
+        the ids of the rows actually inserted (duplicates are skipped).
+        """
+        now = utc_now()
+        now_ms = time.time_ns() // 1_000_000
+
+        def _insert():
+            with self._connect() as conn:
+                self._enforce_quota(conn)
+                project_id = self.get_project_id(conn)
+                prepared = []
+                batch_hashes = set()
+                for event in events:
+                    raw_type = (event.get("event_type") or "task_status").strip()
+                    safe_type = raw_type if raw_type in EVENT_TYPES else "task_status"
+                    safe_summary = normalize_summary(event.get("summary") or "", SUMMARY_MAX_CHARS)
+                    if not safe_summary:
+                        continue
+                    files = self._sanitize_files(event.get("files_touched"))
+                    dedupe_hash = self._dedupe_hash(
+                        safe_type,
+                        safe_summary,
+                        files,
+                        event.get("before_hash"),
+                        event.get("after_hash"),
+                        event.get("reverted_event_id"),
+                        int(event.get("is_effective", 1)),
+                    )
+                    if dedupe_hash in batch_hashes:
+                        continue
+                    batch_hashes.add(dedupe_hash)
+                    prepared.append((event, safe_type, safe_summary, files, dedupe_hash))
+                if not prepared:
+                    return []
+                placeholders = ",".join("?" for _ in prepared)
+                duplicate_hashes = {
+                    row["dedupe_hash"]
+                    for row in conn.execute(
+                        f"SELECT dedupe_hash FROM events "
+                        f"WHERE session_id = ? AND dedupe_hash IN ({placeholders}) "
+                        f"AND created_at_ms >= ?",
+                        (session_id, *(item[4] for item in prepared), now_ms - _DEDUPE_WINDOW_MS),
+                    )
+                }
+                rows = []
+                inserted = []
+                for event, safe_type, safe_summary, files, dedupe_hash in prepared:
+                    if dedupe_hash in duplicate_hashes:
+                        continue
+                    inserted.append((event, safe_type, safe_summary, files))
+                    rows.append(
+                        (
+                            project_id,
+                            session_id,
+                            safe_type,
+                            safe_summary,
+                            json_dumps(files),
+                            event.get("before_hash"),
+                            event.get("after_hash"),
+                            event.get("reverted_event_id"),
+                            int(event.get("is_effective", 1)),
+                            source,
+                            now,
+                            now_ms,
+                            now,
+                            dedupe_hash,
+                        )
+                    )
+                if not rows:
+                    return []
+                conn.executemany(_SQL_INSERT_EVENT, rows)
+                # The writer thread is the only writer and the transaction is
+                # still open, so the batch occupies a contiguous id range.
+                last_id = int(conn.execute("SELECT last_insert_rowid()").fetchone()[0])
+                event_ids = list(range(last_id - len(rows) + 1, last_id + 1))
+                tool_rows = []
+                decision_rows = []
+                for event_id, (event, safe_type, safe_summary, files) in zip(event_ids, inserted):
+                    if event.get("tool_name"):
+                        tool_rows.append(
+                            (
+                                project_id,
+                                session_id,
+                                event_id,
+                                event["tool_name"],
+                                event.get("tool_purpose"),
+                                event.get("tool_result"),
+                                now,
+                            )
+                        )
+                    if safe_type == "decision_made" or event.get("decision_summary"):
+                        decision_rows.append(
+                            (
+                                project_id,
+                                session_id,
+                                event_id,
+                                event.get("decision_summary") or safe_summary,
+                                now,
+                            )
+                        )
+                    self._append_event_log(
+                        {
+                            "event_id": event_id,
+                            "session_id": session_id,
+                            "event_type": safe_type,
+                            "summary": safe_summary,
+                            "files_touched": files,
+                            "before_hash": event.get("before_hash"),
+                            "after_hash": event.get("after_hash"),
+                            "reverted_event_id": event.get("reverted_event_id"),
+                            "source": source,
+                            "created_at": now,
+                        }
+                    )
+                if tool_rows:
+                    conn.executemany(_SQL_INSERT_TOOL_USAGE, tool_rows)
+                if decision_rows:
+                    conn.executemany(_SQL_INSERT_DECISION, decision_rows)
+                self._touch_timestamps(conn, session_id, project_id, now)
+                used = self._storage_usage()
+                conn.execute(_SQL_UPDATE_STORAGE, (used, now, project_id))
+                return event_ids
+
+        return self._run_write(_insert)
 
     def record_file_transition(
         self,
@@ -1014,87 +1415,137 @@ class ProjectStore:
         path: str,
         after_hash: str,
     ) -> int | None:
-        file_path = str(Path(path).as_posix())
-        safe_after_hash = after_hash or DELETED_FILE_HASH
         now = utc_now()
 
         def _insert():
             with self._connect() as conn:
                 self._enforce_quota(conn)
-                state = conn.execute(
-                    """
-                    SELECT current_hash, baseline_hash, last_event_id
-                    FROM file_state
-                    WHERE path = ?
-                    """,
-                    (file_path,),
-                ).fetchone()
-                if state:
-                    before_hash = state["current_hash"]
-                    baseline_hash = state["baseline_hash"]
-                    previous_event_id = int(state["last_event_id"]) if state["last_event_id"] else None
-                else:
-                    before_hash = DELETED_FILE_HASH
-                    baseline_hash = DELETED_FILE_HASH
-                    previous_event_id = None
-
-                if before_hash == safe_after_hash:
-                    return None
-
-                seen_hash_before = self._is_seen_hash(conn, file_path, safe_after_hash)
-                is_revert = bool(seen_hash_before)
-                is_clean = int(safe_after_hash == baseline_hash)
-                if is_revert:
-                    if is_clean:
-                        summary = f"Last changes were reverted for {file_path}; file returned to baseline."
-                    else:
-                        summary = f"Last changes were reverted for {file_path}; file returned to a previous state."
-                    event_type = "revert"
-                else:
-                    summary = f"File changed: {file_path}."
-                    event_type = "code_change"
-
-                event_id = self._insert_event_with_conn(
-                    conn,
-                    session_id=session_id,
-                    event_type=event_type,
-                    summary=summary,
-                    files_touched=[file_path],
-                    source=source,
-                    now=now,
-                    before_hash=before_hash,
-                    after_hash=safe_after_hash,
-                    reverted_event_id=previous_event_id if is_revert else None,
-                    is_effective=1,
+                return self._record_file_transition_with_conn(
+                    conn, session_id, source, path, after_hash, now
                 )
 
-                if previous_event_id:
-                    conn.execute(
-                        """
-                        UPDATE events
-                        SET is_effective = 0,
-                            reverted_by_event_id = CASE WHEN ? THEN ? ELSE reverted_by_event_id END
-                        WHERE id = ?
-                        """,
-                        (1 if is_revert else 0, event_id if is_revert else None, previous_event_id),
+        return self._run_write(_insert)
+
+    def record_file_transitions(
+        self,
+        session_id: int,
+        source: str,
+        items: list[tuple[str, str]],
+    ) -> list[int]:
+        """Record a batch of file transitions inside one transaction.
+
+        Preferred over looping record_file_transition for a poll cycle's
+        worth of changes: quota is checked once and the whole batch shares
+        one commit.
+        """
+        now = utc_now()
+
+        def _insert():
+            with self._connect() as conn:
+                self._enforce_quota(conn)
+                event_ids = []
+                for path, after_hash in items:
+                    event_id = self._record_file_transition_with_conn(
+                        conn, session_id, source, path, after_hash, now
                     )
+                    if event_id is not None:
+                        event_ids.append(event_id)
+                return event_ids
 
-                conn.execute(
-                    """
-                    INSERT INTO file_state(path, current_hash, baseline_hash, last_event_id, is_clean, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(path) DO UPDATE SET
-                        current_hash = excluded.current_hash,
-                        last_event_id = excluded.last_event_id,
-                        is_clean = excluded.is_clean,
-                        updated_at = excluded.updated_at
-                    """,
-                    (file_path, safe_after_hash, baseline_hash, event_id, is_clean, now),
-                )
-                self._upsert_hash_history(conn, file_path, safe_after_hash, now)
-                return event_id
+        return self._run_write(_insert)
 
-        return self._execute_retry(_insert)
+    def _record_file_transition_with_conn(
+        self,
+        conn: sqlite3.Connection,
+        session_id: int,
+        source: str,
+        path: str,
+        after_hash: str,
+        now: str,
+    ) -> int | None:
+        # The recorder already hands over posix-relative strings; only pay
+        # for a Path round-trip when backslash separators show up.
+        file_path = path if "\\" not in path else Path(path).as_posix()
+        safe_after_hash = after_hash or DELETED_FILE_HASH
+        state = conn.execute(
+            """
+            SELECT current_hash, baseline_hash, last_event_id, is_clean
+            FROM file_state
+            WHERE path = ?
+            """,
+            (file_path,),
+        ).fetchone()
+        if state:
+            before_hash = state["current_hash"]
+            baseline_hash = state["baseline_hash"]
+            previous_event_id = int(state["last_event_id"]) if state["last_event_id"] else None
+            was_unclean = 0 if state["is_clean"] else 1
+        else:
+            before_hash = DELETED_FILE_HASH
+            baseline_hash = DELETED_FILE_HASH
+            previous_event_id = None
+            was_unclean = 0
+
+        if before_hash == safe_after_hash:
+            return None
+
+        seen_hash_before = self._is_seen_hash(conn, file_path, safe_after_hash)
+        is_revert = bool(seen_hash_before)
+        is_clean = int(safe_after_hash == baseline_hash)
+        if is_revert:
+            if is_clean:
+                summary = f"Last changes were reverted for {file_path}; file returned to baseline."
+            else:
+                summary = f"Last changes were reverted for {file_path}; file returned to a previous state."
+            event_type = "revert"
+        else:
+            summary = f"File changed: {file_path}."
+            event_type = "code_change"
+
+        event_id = self._insert_event_with_conn(
+            conn,
+            session_id=session_id,
+            event_type=event_type,
+            summary=summary,
+            files_touched=[file_path],
+            source=source,
+            now=now,
+            before_hash=before_hash,
+            after_hash=safe_after_hash,
+            reverted_event_id=previous_event_id if is_revert else None,
+            is_effective=1,
+        )
+
+        if previous_event_id:
+            conn.execute(
+                """
+                UPDATE events
+                SET is_effective = 0,
+                    reverted_by_event_id = CASE WHEN ? THEN ? ELSE reverted_by_event_id END
+                WHERE id = ?
+                """,
+                (1 if is_revert else 0, event_id if is_revert else None, previous_event_id),
+            )
+
+        conn.execute(
+            """
+            INSERT INTO file_state(path, current_hash, baseline_hash, last_event_id, is_clean, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                current_hash = excluded.current_hash,
+                last_event_id = excluded.last_event_id,
+                is_clean = excluded.is_clean,
+                updated_at = excluded.updated_at
+            """,
+            (file_path, safe_after_hash, baseline_hash, event_id, is_clean, now),
+        )
+        delta = (1 - is_clean) - was_unclean
+        if delta:
+            conn.execute(
+                _SQL_BUMP_CHANGED_FILES, (self.get_project_id(conn), delta, now)
+            )
+        self._upsert_hash_history(conn, file_path, safe_after_hash, now)
+        return event_id
 
     def status_snapshot(self, recent_limit: int = 5) -> dict:
         def _read():
@@ -1132,15 +1583,21 @@ class ProjectStore:
                         """,
                         (latest_session_id,),
                     ).fetchall()
-                events = conn.execute(
-                    """
-                    SELECT event_type, summary, source, created_at, is_effective
-                    FROM events
-                    ORDER BY id DESC
-                    LIMIT ?
-                    """,
-                    (recent_limit,),
-                ).fetchall()
+                # Project exactly the fields consumers serialize and coalesce in
+                # SQL, so callers can pass the rows through as plain dicts.
+                events = [
+                    dict(row)
+                    for row in conn.execute(
+                        """
+                        SELECT event_type, summary, source, created_at,
+                               COALESCE(is_effective, 0) AS is_effective
+                        FROM events
+                        ORDER BY id DESC
+                        LIMIT ?
+                        """,
+                        (recent_limit,),
+                    )
+                ]
                 last_revert = conn.execute(
                     """
                     SELECT created_at, summary
@@ -1150,17 +1607,29 @@ class ProjectStore:
                     LIMIT 1
                     """
                 ).fetchone()
-                changed_files = conn.execute(
-                    "SELECT COUNT(*) AS c FROM file_state WHERE is_clean = 0"
-                ).fetchone()
+                # Maintained transactionally by the file-transition path, so
+                # status stays O(1) as file_state grows.
+                counter = None
+                if project:
+                    counter = conn.execute(
+                        "SELECT changed_files FROM status_counters WHERE project_id = ?",
+                        (int(project["id"]),),
+                    ).fetchone()
+                if counter is not None:
+                    changed_files = int(counter["changed_files"])
+                else:
+                    row = conn.execute(
+                        "SELECT COUNT(*) AS c FROM file_state WHERE is_clean = 0"
+                    ).fetchone()
+                    changed_files = int(row["c"]) if row else 0
                 return {
                     "project": project,
                     "active_session": active_session,
                     "source_status": source_rows,
                     "events": events,
                     "last_revert": last_revert,
-                    "effective_changed_files": int(changed_files["c"]) if changed_files else 0,
+                    "effective_changed_files": changed_files,
                     "storage_used_bytes": self._storage_usage(),
                 }
 
-        return self._execute_retry(_read)
+        return _read()
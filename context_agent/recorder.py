@@ -3,16 +3,31 @@
 from __future__ import annotations
 
 import hashlib
-import json
+import os
+import queue
+import re
 import signal
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from .constants import DELETED_FILE_HASH, SUPPORTED_ADAPTERS
 from .project_db import ProjectStore, StorageCapError
 from .registry import Registry
-from .utils import normalize_path
+from .utils import json_loads, normalize_path
+
+try:  # Optional: OS-level file events instead of full-tree polling.
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ModuleNotFoundError:
+    FileSystemEventHandler = object
+    Observer = None
+
+try:  # Optional: in-process git via libgit2 instead of CLI subprocesses.
+    import pygit2
+except ModuleNotFoundError:
+    pygit2 = None
 
 
 EXCLUDED_DIRS = {
@@ -27,6 +42,24 @@ EXCLUDED_DIRS = {
     ".vscode",
 }
 
+# Single compiled match replaces one .lower() copy plus five startswith
+# probes per plain-text adapter line.
+_SPEAKER_RE = re.compile(r"(user|assistant|claude|cursor|codex|agent):(.*)", re.IGNORECASE | re.DOTALL)
+
+
+class _WatchHandler(FileSystemEventHandler):
+    """Forwards watchdog events into the recorder's change queue."""
+
+    def __init__(self, recorder: "Recorder"):
+        self.recorder = recorder
+
+    def on_any_event(self, event) -> None:
+        if getattr(event, "is_directory", False):
+            return
+        for raw in (event.src_path, getattr(event, "dest_path", None)):
+            if raw:
+                self.recorder._note_fs_event(raw)
+
 
 class Recorder:
     def __init__(
@@ -46,6 +79,23 @@ class Recorder:
         self.stop_requested = False
         self.last_git_snapshot: tuple[str, str] | None = None
         self.last_file_snapshot: dict[str, str] | None = None
+        # rel path -> (mtime_ns, size, hash); lets quiescent scans skip
+        # re-hashing files whose stat tuple has not moved.
+        self._stat_cache: dict[str, tuple[int, int, str]] = {}
+        # Populated only when a watchdog observer is running.
+        self._fs_events: queue.Queue | None = None
+        # path -> monotonic time of last watch event, for debouncing.
+        self._pending_fs: dict[str, float] = {}
+        self._git_probe_mtimes: tuple[int, int] | None = None
+        self._repo = None
+        if pygit2 is not None:
+            try:
+                self._repo = pygit2.Repository(str(self.project_path))
+            except Exception:
+                self._repo = None
+        # True whenever the working tree moved since the last git poll; the
+        # first poll always runs in full.
+        self._fs_changed = True
 
     def request_stop(self, *_args) -> None:
         self.stop_requested = True
@@ -56,17 +106,24 @@ class Recorder:
 
         self.store.update_source_status(self.session_id, "git", "unknown", "awaiting first scan")
         self.store.update_source_status(self.session_id, "filesystem", "unknown", "awaiting first scan")
+        adapters = self.registry.get_adapter_configs()
         for adapter in SUPPORTED_ADAPTERS:
-            self._update_adapter_availability(adapter)
+            self._update_adapter_availability(adapter, adapters)
 
-        while not self.stop_requested:
-            state = self.store.get_session_state(self.session_id)
-            if state in {"stopping", "stopped", None}:
-                break
-            self._poll_adapters()
-            self._poll_git()
-            self._poll_filesystem()
-            time.sleep(self.interval_seconds)
+        observer = self._start_watcher()
+        try:
+            while not self.stop_requested:
+                state = self.store.get_session_state(self.session_id)
+                if state in {"stopping", "stopped", None}:
+                    break
+                self._poll_adapters()
+                self._poll_git()
+                self._poll_filesystem()
+                time.sleep(self.interval_seconds)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join(timeout=2)
 
         try:
             self.store.insert_event(
@@ -83,11 +140,13 @@ class Recorder:
         return 0
 
     def _poll_adapters(self) -> None:
+        # One registry read per tick; get_adapter_configs opens a fresh
+        # connection, so per-adapter lookups would pay that three times.
+        adapters = self.registry.get_adapter_configs()
         for adapter in SUPPORTED_ADAPTERS:
-            self._poll_adapter(adapter)
+            self._poll_adapter(adapter, adapters)
 
-    def _update_adapter_availability(self, adapter: str) -> None:
-        adapters = self.registry.get_adapter_configs()
+    def _update_adapter_availability(self, adapter: str, adapters: dict[str, str]) -> None:
         configured = adapters.get(adapter)
         if not configured:
             self.store.update_source_status(
@@ -104,8 +163,7 @@ class Recorder:
             self.session_id, f"adapter:{adapter}", "available", str(path)
         )
 
-    def _poll_adapter(self, adapter: str) -> None:
-        adapters = self.registry.get_adapter_configs()
+    def _poll_adapter(self, adapter: str, adapters: dict[str, str]) -> None:
         configured = adapters.get(adapter)
         if not configured:
             return
@@ -118,56 +176,68 @@ class Recorder:
 
         self.store.update_source_status(self.session_id, f"adapter:{adapter}", "available", str(log_path))
         current_offset = self.store.get_adapter_offset(self.session_id, adapter, str(log_path))
+        # Stream the tail line by line instead of materializing it: a busy
+        # agent can write megabytes between polls. Byte lengths are summed
+        # manually because tell() is unreliable while iterating a buffered
+        # reader. Each flushed batch commits its offset, so a storage-cap
+        # abort only loses position for the batch that failed.
+        batch: list[dict] = []
+        consumed = current_offset
         try:
             with log_path.open("rb") as handle:
                 handle.seek(current_offset)
-                data = handle.read()
-                new_offset = handle.tell()
+                for raw_line in handle:
+                    consumed += len(raw_line)
+                    parsed = self._parse_adapter_line(adapter, raw_line)
+                    if parsed:
+                        batch.append(parsed)
+                    if len(batch) >= self._ADAPTER_BATCH:
+                        if not self._flush_adapter_batch(adapter, log_path, batch, consumed):
+                            return
+                        batch = []
         except OSError as exc:
             self.store.update_source_status(
                 self.session_id, f"adapter:{adapter}", "degraded", f"read error: {exc}"
             )
             return
 
-        if not data:
-            return
+        if batch or consumed != current_offset:
+            self._flush_adapter_batch(adapter, log_path, batch, consumed)
 
-        text = data.decode("utf-8", errors="ignore")
-        for raw_line in text.splitlines():
-            parsed = self._parse_adapter_line(adapter, raw_line)
-            if not parsed:
-                continue
-            try:
-                self.store.insert_event(
-                    session_id=self.session_id,
-                    event_type=parsed["event_type"],
-                    summary=parsed["summary"],
-                    files_touched=parsed.get("files_touched"),
-                    source=f"adapter:{adapter}",
-                    tool_name=parsed.get("tool_name"),
-                    tool_purpose=parsed.get("tool_purpose"),
-                    tool_result=parsed.get("tool_result"),
-                    decision_summary=parsed.get("decision_summary"),
-                )
-            except StorageCapError:
-                self.store.update_source_status(
-                    self.session_id,
-                    f"adapter:{adapter}",
-                    "degraded",
-                    "storage cap reached; event dropped",
-                )
-                return
+    # Matches the event-log writer's batch size; one transaction per batch.
+    _ADAPTER_BATCH = 256
 
-        self.store.set_adapter_offset(self.session_id, adapter, str(log_path), new_offset)
+    def _flush_adapter_batch(
+        self, adapter: str, log_path: Path, batch: list[dict], offset: int
+    ) -> bool:
+        try:
+            if batch:
+                self.store.insert_events_bulk(self.session_id, batch, source=f"adapter:{adapter}")
+        except StorageCapError:
+            self.store.update_source_status(
+                self.session_id,
+                f"adapter:{adapter}",
+                "degraded",
+                "storage cap reached; event dropped",
+            )
+            return False
+        self.store.set_adapter_offset(self.session_id, adapter, str(log_path), offset)
+        return True
 
-    def _parse_adapter_line(self, adapter: str, line: str) -> dict | None:
-        text = line.strip()
-        if not text:
+    def _parse_adapter_line(self, adapter: str, line: bytes) -> dict | None:
+        raw = line.strip()
+        if not raw:
             return None
-        try:
-            payload = json.loads(text)
-        except json.JSONDecodeError:
-            payload = None
+        # Only dict payloads are consumed below, so non-"{" lines skip the
+        # parse attempt (and its exception) entirely. Parsing the bytes
+        # directly avoids decoding JSON lines twice (orjson takes bytes, and
+        # stdlib json.loads accepts them too).
+        payload = None
+        if raw[:1] == b"{":
+            try:
+                payload = json_loads(raw)
+            except ValueError:
+                payload = None
 
         if isinstance(payload, dict):
             summary = (
@@ -204,13 +274,14 @@ class Recorder:
                 parsed["decision_summary"] = payload["decision_summary"]
             return parsed
 
-        lowered = text.lower()
-        if lowered.startswith("user:"):
-            event_type = "user_intent"
-            summary = text[5:].strip()
-        elif lowered.startswith(("assistant:", "claude:", "cursor:", "codex:", "agent:")):
-            event_type = "agent_plan"
-            summary = text.split(":", 1)[1].strip() if ":" in text else text
+        # Plain-text lines still need a str for the regex and the summary.
+        text = raw.decode("utf-8", errors="ignore").strip()
+        if not text:
+            return None
+        match = _SPEAKER_RE.match(text)
+        if match is not None:
+            event_type = "user_intent" if match.group(1).lower() == "user" else "agent_plan"
+            summary = match.group(2).strip()
         else:
             event_type = "task_status"
             summary = text
@@ -218,7 +289,42 @@ class Recorder:
             return None
         return {"event_type": event_type, "summary": summary, "files_touched": []}
 
+    def _git_probe(self) -> tuple[int, int] | None:
+        git_dir = self.project_path / ".git"
+        try:
+            head_mtime = (git_dir / "HEAD").stat().st_mtime_ns
+        except OSError:
+            return None
+        try:
+            index_mtime = (git_dir / "index").stat().st_mtime_ns
+        except OSError:
+            index_mtime = 0
+        return (head_mtime, index_mtime)
+
     def _poll_git(self) -> None:
+        # Two stat calls stand in for three subprocess spawns when nothing
+        # moved: unstaged edits do not touch .git, so the probe is paired
+        # with the filesystem-change flag from the scan loop.
+        probe = self._git_probe()
+        if (
+            probe is not None
+            and probe == self._git_probe_mtimes
+            and not self._fs_changed
+            and self.last_git_snapshot is not None
+        ):
+            head = self.last_git_snapshot[0]
+            self.store.update_source_status(
+                self.session_id, "git", "available", f"head={head[:12]}"
+            )
+            return
+        self._git_probe_mtimes = probe
+        self._fs_changed = False
+        if self._repo is not None:
+            snapshot = self._git_snapshot_inprocess()
+            if snapshot is not None:
+                self._process_git_snapshot(*snapshot)
+                return
+            # libgit2 failed mid-session; fall through to the CLI.
         git_check = subprocess.run(
             ["git", "-C", str(self.project_path), "rev-parse", "--is-inside-work-tree"],
             capture_output=True,
@@ -246,6 +352,28 @@ class Recorder:
 
         status_output = status_run.stdout.strip()
         head = head_run.stdout.strip() if head_run.returncode == 0 else "NO_HEAD"
+        self._process_git_snapshot(head, status_output)
+
+    def _git_snapshot_inprocess(self) -> tuple[str, str] | None:
+        """Read HEAD and working-tree status via libgit2, or None on failure."""
+        try:
+            try:
+                head = str(self._repo.head.target)
+            except Exception:
+                head = "NO_HEAD"
+            status = self._repo.status()
+        except Exception:
+            return None
+        # Porcelain-shaped lines ("XY path") so downstream parsing is shared
+        # with the CLI path; the exact two-letter code is not load-bearing.
+        lines = [
+            f"M  {path}"
+            for path, flags in sorted(status.items())
+            if not flags & pygit2.GIT_STATUS_IGNORED
+        ]
+        return head, "\n".join(lines)
+
+    def _process_git_snapshot(self, head: str, status_output: str) -> None:
         snapshot = (head, status_output)
         self.store.update_source_status(self.session_id, "git", "available", f"head={head[:12]}")
         if self.last_git_snapshot is None:
@@ -294,6 +422,12 @@ class Recorder:
         self.last_git_snapshot = snapshot
 
     def _file_hash(self, path: Path) -> str:
+        # Stays SHA-256: stored file_hash_history entries must keep matching.
+        # file_digest (3.11+) runs the read loop in C; older runtimes chunk
+        # manually.
+        if hasattr(hashlib, "file_digest"):
+            with path.open("rb") as handle:
+                return hashlib.file_digest(handle, "sha256").hexdigest()
         digest = hashlib.sha256()
         with path.open("rb") as handle:
             while True:
@@ -303,54 +437,158 @@ class Recorder:
                 digest.update(chunk)
         return digest.hexdigest()
 
+    def _hash_or_none(self, path: Path) -> str | None:
+        try:
+            return self._file_hash(path)
+        except OSError:
+            return None
+
+    def _walk_project(self, root: str, prefix: str):
+        """Yield (rel_key, absolute path, stat) for project files.
+
+        Prunes EXCLUDED_DIRS before descending, so .git/node_modules trees
+        are never stat'd — rglob would walk them and filter afterwards.
+        """
+        try:
+            entries = os.scandir(root)
+        except OSError:
+            return
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in EXCLUDED_DIRS:
+                            continue
+                        yield from self._walk_project(entry.path, prefix + entry.name + "/")
+                    elif entry.is_file(follow_symlinks=False):
+                        yield prefix + entry.name, entry.path, entry.stat()
+                except OSError:
+                    continue
+
     def _scan_files(self) -> dict[str, str]:
         snapshot: dict[str, str] = {}
-        for path in self.project_path.rglob("*"):
-            if not path.is_file():
-                continue
-            rel = path.relative_to(self.project_path)
-            if any(part in EXCLUDED_DIRS for part in rel.parts):
-                continue
-            try:
-                snapshot[rel.as_posix()] = self._file_hash(path)
-            except OSError:
-                continue
+        stat_cache = self._stat_cache
+        fresh_cache: dict[str, tuple[int, int, str]] = {}
+        to_hash: list[tuple[str, Path, int, int]] = []
+        for rel_key, abs_path, stat in self._walk_project(str(self.project_path), ""):
+            path = Path(abs_path)
+            cached = stat_cache.get(rel_key)
+            if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                snapshot[rel_key] = cached[2]
+                fresh_cache[rel_key] = cached
+            else:
+                to_hash.append((rel_key, path, stat.st_mtime_ns, stat.st_size))
+        if to_hash:
+            # hashlib releases the GIL, so rehash-heavy scans scale with
+            # cores; tiny batches stay serial to skip pool setup.
+            if len(to_hash) >= 16:
+                with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+                    hashes = list(pool.map(self._hash_or_none, (item[1] for item in to_hash)))
+            else:
+                hashes = [self._hash_or_none(item[1]) for item in to_hash]
+            for (rel_key, _path, mtime_ns, size), file_hash in zip(to_hash, hashes):
+                if file_hash is None:
+                    continue
+                snapshot[rel_key] = file_hash
+                fresh_cache[rel_key] = (mtime_ns, size, file_hash)
+        # Entries for files that vanished this scan drop out here.
+        self._stat_cache = fresh_cache
         return snapshot
 
-    def _poll_filesystem(self) -> None:
-        current = self._scan_files()
-        self.store.update_source_status(self.session_id, "filesystem", "available", "scan ok")
-        if self.last_file_snapshot is None:
-            self.last_file_snapshot = current
-            self.store.initialize_file_state(current)
+    def _start_watcher(self):
+        if Observer is None:
+            return None
+        observer = Observer()
+        try:
+            observer.schedule(_WatchHandler(self), str(self.project_path), recursive=True)
+            observer.start()
+        except OSError:
+            return None
+        self._fs_events = queue.Queue()
+        return observer
+
+    def _note_fs_event(self, raw_path: str) -> None:
+        try:
+            rel = Path(raw_path).relative_to(self.project_path)
+        except ValueError:
             return
+        if any(part in EXCLUDED_DIRS for part in rel.parts):
+            return
+        events = self._fs_events
+        if events is not None:
+            events.put((rel.as_posix(), time.monotonic()))
+
+    # Editor saves often fire several events per file (temp file, rename,
+    # atomic replace); waiting this long lets them collapse into one hash.
+    _DEBOUNCE_SECONDS = 0.2
 
-        added = [path for path in current if path not in self.last_file_snapshot]
-        removed = [path for path in self.last_file_snapshot if path not in current]
-        modified = [
-            path
-            for path, file_hash in current.items()
-            if path in self.last_file_snapshot and self.last_file_snapshot[path] != file_hash
+    def _apply_fs_events(self) -> dict[str, str] | None:
+        """Build the next snapshot from queued watch events, or None if idle."""
+        pending = self._pending_fs
+        while True:
+            try:
+                rel_key, seen_at = self._fs_events.get_nowait()
+            except queue.Empty:
+                break
+            pending[rel_key] = seen_at
+        self.store.update_source_status(self.session_id, "filesystem", "available", "watch ok")
+        if not pending:
+            return None
+        now = time.monotonic()
+        ready = [
+            rel_key
+            for rel_key, seen_at in pending.items()
+            if now - seen_at >= self._DEBOUNCE_SECONDS
         ]
-        changed = added + modified + removed
+        if not ready:
+            return None
+        current = dict(self.last_file_snapshot)
+        for rel_key in ready:
+            del pending[rel_key]
+            try:
+                current[rel_key] = self._file_hash(self.project_path / rel_key)
+            except OSError:
+                current.pop(rel_key, None)
+        return current
+
+    def _poll_filesystem(self) -> None:
+        if self._fs_events is not None and self.last_file_snapshot is not None:
+            # Watch mode: only files the OS reported get re-hashed.
+            maybe_current = self._apply_fs_events()
+            if maybe_current is None:
+                return
+            current = maybe_current
+        else:
+            current = self._scan_files()
+            self.store.update_source_status(self.session_id, "filesystem", "available", "scan ok")
+            if self.last_file_snapshot is None:
+                self.last_file_snapshot = current
+                self.store.initialize_file_state(current)
+                return
+
+        # Set algebra on the key views runs in C; only the intersection needs
+        # a Python-level hash comparison.
+        previous = self.last_file_snapshot
+        cur_keys = current.keys()
+        prev_keys = previous.keys()
+        added = cur_keys - prev_keys
+        removed = prev_keys - cur_keys
+        modified = [path for path in cur_keys & prev_keys if current[path] != previous[path]]
+        changed = [*added, *modified, *removed]
         if not changed:
             self.last_file_snapshot = current
             return
 
-        for path in changed:
-            after_hash = current.get(path)
-            if after_hash is None:
-                after_hash = DELETED_FILE_HASH
-            try:
-                self.store.record_file_transition(
-                    session_id=self.session_id,
-                    source="filesystem",
-                    path=path,
-                    after_hash=after_hash,
-                )
-            except StorageCapError:
-                self.store.update_source_status(
-                    self.session_id, "filesystem", "degraded", "storage cap reached; file event dropped"
-                )
-                break
+        self._fs_changed = True
+        items = [(path, current.get(path) or DELETED_FILE_HASH) for path in changed]
+        try:
+            self.store.record_file_transitions(
+                session_id=self.session_id,
+                source="filesystem",
+                items=items,
+            )
+        except StorageCapError:
+            self.store.update_source_status(
+                self.session_id, "filesystem", "degraded", "storage cap reached; file event dropped"
+            )
         self.last_file_snapshot = current
